@@ -46,13 +46,34 @@ INSTALLED_APPS = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'AssignEaseApp.authentication.RevocationAwareJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
 }
 
+# Serve SubmissionViewSet.list and ClassStudentViewSet.list from values_list()
+# projections instead of per-row serializers. The JSON output is identical.
+FAST_LIST_ENDPOINTS = True
+
+# Maximum number of sub-requests accepted by the batch/ endpoint.
+BATCH_MAX_REQUESTS = 20
+
+# Purge a deleted class's rows on a background thread right after the request.
+# Interrupted purges are finished by `manage.py purge_deleted_classes`.
+PURGE_DELETED_CLASSES_IN_BACKGROUND = True
+
+# The upload endpoint imports cohorts on a background thread; the job and its
+# report, generated passwords included, are kept in the database (so any
+# worker can answer a poll) this long for the teacher to collect. Large
+# imports are better run with `manage.py import_cohort`.
+COHORT_IMPORT_REPORT_SECONDS = 60 * 60
+
+# Days after the last assignment due date before `manage.py archive_closed_classes`
+# moves a class's submissions into the compressed archive.
+ARCHIVE_AFTER_DAYS = 30
+
 from datetime import timedelta
 
 SIMPLE_JWT = {
@@ -61,8 +82,25 @@ SIMPLE_JWT = {
     'ROTATE_REFRESH_TOKENS': True,
     'BLACKLIST_AFTER_ROTATION': True,
     'AUTH_HEADER_TYPES': ('Bearer',),
+    # Rotated refresh tokens are revoked in AssignEaseApp's RevokedToken table.
+    'TOKEN_REFRESH_SERIALIZER': 'AssignEaseApp.serializers.RevocationAwareTokenRefreshSerializer',
 }
 
+# Revoked JWTs (AssignEaseApp/revocation.py). Each worker mirrors the
+# RevokedToken table in a Bloom filter sized for this many tokens at this
+# false-positive rate, and reads new rows at most this often; revocations
+# made on one worker reach the others within REVOKED_TOKEN_REFRESH_SECONDS.
+# Run `manage.py prune_revoked_tokens` periodically.
+REVOKED_TOKEN_FILTER_CAPACITY = 100_000
+REVOKED_TOKEN_FILTER_ERROR_RATE = 0.001
+REVOKED_TOKEN_REFRESH_SECONDS = 5
+
+# Request-scoped identity map for repeated primary-key lookups (see
+# AssignEaseApp/identity.py). Off by default: within a request every lookup
+# of a row returns the same instance, so a view that changes an instance
+# without saving it would show those changes to the rest of the request.
+IDENTITY_MAP_ENABLED = False
+
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -70,6 +108,9 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'AssignEaseApp.middleware.ReplicaRoutingMiddleware',
+    # Does nothing unless IDENTITY_MAP_ENABLED is set.
+    'AssignEaseApp.middleware.IdentityMapMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -111,6 +152,18 @@ DATABASES = {
     }
 }
 
+# Read replicas of 'default'. Safe-method requests read from one of these
+# aliases; writes, and reads by a user who wrote in the last
+# REPLICA_STICKY_SECONDS, stay on 'default'. Pinning is stored in the cache,
+# so use a shared cache backend when running several workers.
+# To try it locally with two SQLite files (run `migrate --database replica` too):
+#   DATABASES['replica'] = {'ENGINE': 'django.db.backends.sqlite3', 'NAME': BASE_DIR / 'replica.sqlite3'}
+#   DATABASE_REPLICAS = ['replica']
+# In tests, give replicas 'TEST': {'MIRROR': 'default'}.
+DATABASE_REPLICAS = []
+REPLICA_STICKY_SECONDS = 10
+DATABASE_ROUTERS = ['AssignEaseApp.routers.PrimaryReplicaRouter']
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.0/ref/settings/#auth-password-validators
@@ -148,7 +201,32 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# Uploaded submission files. They are served through the API, not from MEDIA_URL.
+MEDIA_ROOT = BASE_DIR / 'media'
+
+# Per-worker cache of language and class names used by the serializers (see
+# AssignEaseApp/refcache.py). The TTL bounds how stale another worker can be.
+REFERENCE_CACHE_MAX_ENTRIES = 10_000
+REFERENCE_CACHE_TTL_SECONDS = 300
+
+# Most hourly or daily buckets one activity/ request may cover.
+ACTIVITY_MAX_BUCKETS = 2000
+
+# Review queue: how long a grader's claim on a submission lasts, and how many
+# submissions one claim request may take.
+REVIEW_CLAIM_LEASE_SECONDS = 15 * 60
+REVIEW_CLAIM_DEFAULT_LIMIT = 10
+REVIEW_CLAIM_MAX_LIMIT = 50
+
+# Limits enforced while a submission's files are streamed to disk.
+SUBMISSION_FILE_MAX_SIZE = 10 * 1024 * 1024
+SUBMISSION_FILES_MAX_TOTAL_SIZE = 50 * 1024 * 1024
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.0/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Admin changelists of unfiltered tables larger than this use the database's
+# row estimate instead of COUNT(*).
+ESTIMATED_COUNT_THRESHOLD = 100_000
@@ -1,11 +1,143 @@
 from django.contrib import admin
-from .models import Profile, Class, ClassStudent, ProgrammingLanguage, Assignment, AssignmentQuestion, Submission, TeacherFeedback
-
-admin.site.register(Profile)
-admin.site.register(Class)
-admin.site.register(ClassStudent)
-admin.site.register(ProgrammingLanguage)
-admin.site.register(Assignment)
-admin.site.register(AssignmentQuestion)
-admin.site.register(Submission)
-admin.site.register(TeacherFeedback)
+from .models import (
+    Profile, Class, ClassStudent, ProgrammingLanguage, Assignment, AssignmentQuestion, Submission, TeacherFeedback,
+    ArchivedSubmission, SubmissionRevision, SubmissionFile, PendingAssignment, RevokedToken, SubmissionActivity,
+    LeaderboardEntry,
+)
+from .pagination import EstimatedCountPaginator
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """
+    Changelist defaults for tables that grow to millions of rows: estimated
+    counts, no second unfiltered count, and raw-id or autocomplete widgets
+    instead of <select>s listing every related row.
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    list_per_page = 50
+
+
+@admin.register(Profile)
+class ProfileAdmin(LargeTableAdmin):
+    list_display = ('user', 'name', 'role', 'enrollment_number', 'tid')
+    list_select_related = ('user',)
+    list_filter = ('role',)
+    raw_id_fields = ('user',)
+    search_fields = ('user__username', 'name', 'enrollment_number', 'tid')
+
+
+@admin.register(Class)
+class ClassAdmin(LargeTableAdmin):
+    list_display = ('class_name', 'teacher', 'student_count', 'created_at', 'closed_at', 'deleted_at')
+    list_select_related = ('teacher',)
+    list_filter = (('deleted_at', admin.EmptyFieldListFilter),)
+    raw_id_fields = ('teacher',)
+    search_fields = ('class_name',)
+    readonly_fields = ('student_count',)
+
+    def get_queryset(self, request):
+        # Show deleted classes that are still waiting to be purged as well.
+        return Class.all_objects.all()
+
+
+@admin.register(ClassStudent)
+class ClassStudentAdmin(LargeTableAdmin):
+    list_display = ('id', 'student', 'class_assigned')
+    list_select_related = ('student', 'class_assigned')
+    raw_id_fields = ('student',)
+    autocomplete_fields = ('class_assigned',)
+
+
+@admin.register(ProgrammingLanguage)
+class ProgrammingLanguageAdmin(admin.ModelAdmin):
+    list_display = ('language_name',)
+    search_fields = ('language_name',)
+
+
+@admin.register(Assignment)
+class AssignmentAdmin(LargeTableAdmin):
+    list_display = (
+        'title', 'class_assigned', 'teacher', 'language', 'due_date',
+        'submitted_count', 'checked_count', 'reassigned_count', 'rejected_count',
+    )
+    list_select_related = ('class_assigned', 'teacher', 'language')
+    list_filter = ('due_date',)
+    raw_id_fields = ('teacher',)
+    autocomplete_fields = ('class_assigned', 'language')
+    search_fields = ('title',)
+    readonly_fields = ('submitted_count', 'checked_count', 'reassigned_count', 'rejected_count')
+
+
+@admin.register(AssignmentQuestion)
+class AssignmentQuestionAdmin(LargeTableAdmin):
+    list_display = ('__str__', 'assignment', 'created_at')
+    list_select_related = ('assignment',)
+    raw_id_fields = ('assignment',)
+
+
+@admin.register(Submission)
+class SubmissionAdmin(LargeTableAdmin):
+    list_display = ('id', 'student', 'assignment', 'question', 'status', 'submitted_at')
+    list_select_related = ('student', 'assignment', 'question__assignment')
+    list_filter = ('status',)
+    raw_id_fields = ('student', 'assignment', 'question')
+
+
+@admin.register(TeacherFeedback)
+class TeacherFeedbackAdmin(LargeTableAdmin):
+    list_display = ('id', 'submission', 'teacher', 'resubmission_requested', 'created_at')
+    list_select_related = ('submission', 'teacher')
+    raw_id_fields = ('submission', 'teacher')
+
+
+@admin.register(ArchivedSubmission)
+class ArchivedSubmissionAdmin(LargeTableAdmin):
+    list_display = ('id', 'student', 'assignment', 'status', 'submitted_at', 'archived_at')
+    list_select_related = ('student', 'assignment')
+    raw_id_fields = ('student', 'assignment', 'question')
+    exclude = ('data',)
+
+
+@admin.register(SubmissionRevision)
+class SubmissionRevisionAdmin(LargeTableAdmin):
+    list_display = ('submission_id', 'number', 'is_snapshot', 'created_at')
+    raw_id_fields = ('submission',)
+    exclude = ('data',)
+
+
+@admin.register(SubmissionFile)
+class SubmissionFileAdmin(LargeTableAdmin):
+    list_display = ('name', 'submission_id', 'size', 'uploaded_at')
+    raw_id_fields = ('submission',)
+
+
+@admin.register(PendingAssignment)
+class PendingAssignmentAdmin(LargeTableAdmin):
+    list_display = ('student', 'assignment', 'class_assigned', 'due_date')
+    list_select_related = ('student', 'assignment', 'class_assigned')
+    raw_id_fields = ('student', 'assignment', 'class_assigned')
+
+
+@admin.register(SubmissionActivity)
+class SubmissionActivityAdmin(LargeTableAdmin):
+    list_display = ('class_assigned', 'assignment', 'status', 'granularity', 'bucket', 'count')
+    list_select_related = ('class_assigned', 'assignment')
+    list_filter = ('granularity', 'status')
+    raw_id_fields = ('class_assigned', 'assignment')
+
+
+@admin.register(LeaderboardEntry)
+class LeaderboardEntryAdmin(LargeTableAdmin):
+    list_display = ('class_assigned', 'student', 'score', 'checked_count', 'on_time_count', 'submission_count')
+    list_select_related = ('class_assigned', 'student')
+    raw_id_fields = ('class_assigned', 'student')
+    readonly_fields = ('checked_count', 'on_time_count', 'submission_count', 'score')
+
+
+@admin.register(RevokedToken)
+class RevokedTokenAdmin(LargeTableAdmin):
+    list_display = ('jti', 'user', 'token_type', 'revoked_at', 'expires_at')
+    list_select_related = ('user',)
+    raw_id_fields = ('user',)
+    search_fields = ('jti', 'user__username')
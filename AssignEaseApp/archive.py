@@ -0,0 +1,127 @@
+"""
+Cold storage for the submissions of finished classes.
+
+Once every assignment of a class is past its due date (plus
+``ARCHIVE_AFTER_DAYS``), or the teacher closed the class, its submissions
+and teacher feedback are moved into ``ArchivedSubmission`` rows with the
+bulky fields zlib-compressed. The hot ``Submission`` table then only holds
+the current term. Archived rows are turned back into unsaved ``Submission``
+instances, so the existing serializers can still render them.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, Max, OuterRef, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Class, Submission, TeacherFeedback, ArchivedSubmission
+from .packing import pack, unpack
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 500
+
+
+def archivable_classes():
+    """Classes that are closed or finished and still have hot submissions."""
+    cutoff = timezone.now().date() - timedelta(days=settings.ARCHIVE_AFTER_DAYS)
+    return (
+        Class.objects
+        .annotate(last_due_date=Max('assignment__due_date'))
+        .filter(Q(closed_at__isnull=False) | Q(last_due_date__lt=cutoff))
+        .filter(Exists(Submission.objects.filter(assignment__class_assigned=OuterRef('pk'))))
+    )
+
+
+def frozen_classes():
+    """
+    Classes whose submissions may no longer change: closed, deleted (and
+    waiting to be purged), or already (being) archived.
+    """
+    return Class.all_objects.filter(
+        Q(closed_at__isnull=False)
+        | Q(deleted_at__isnull=False)
+        | Exists(ArchivedSubmission.objects.filter(assignment__class_assigned=OuterRef('pk')))
+    )
+
+
+def is_frozen(class_id):
+    return frozen_classes().filter(pk=class_id).exists()
+
+
+def archive_class(class_id, batch_size=DEFAULT_BATCH_SIZE, progress=None):
+    """
+    Move one class's submissions and feedback into the archive.
+
+    Each batch is copied and removed in a single short transaction, so an
+    interrupted run simply continues with the rows that are still hot.
+    """
+    archived = 0
+    while True:
+        with transaction.atomic():
+            batch = list(
+                Submission.objects.select_for_update()
+                .filter(assignment__class_assigned_id=class_id)
+                .order_by('pk')[:batch_size]
+            )
+            if not batch:
+                break
+            ids = [submission.pk for submission in batch]
+
+            feedback = {}
+            for row in TeacherFeedback.objects.filter(submission_id__in=ids).order_by('pk').values(
+                'id', 'submission_id', 'teacher_id', 'feedback', 'resubmission_requested', 'created_at'
+            ):
+                row['created_at'] = row['created_at'].isoformat()
+                feedback.setdefault(row.pop('submission_id'), []).append(row)
+
+            ArchivedSubmission.objects.bulk_create([
+                ArchivedSubmission(
+                    id=submission.pk,
+                    student_id=submission.student_id,
+                    assignment_id=submission.assignment_id,
+                    question_id=submission.question_id,
+                    status=submission.status,
+                    submitted_at=submission.submitted_at,
+                    data=pack({
+                        'code': submission.code,
+                        'feedback': submission.feedback,
+                        'updated_at': submission.updated_at.isoformat(),
+                        'teacher_feedback': feedback.get(submission.pk, []),
+                    }),
+                )
+                for submission in batch
+            ])
+            TeacherFeedback._base_manager.filter(submission_id__in=ids)._raw_delete(TeacherFeedback.objects.db)
+            Submission._base_manager.filter(pk__in=ids)._raw_delete(Submission.objects.db)
+
+        archived += len(batch)
+        if progress:
+            progress(class_id, archived)
+
+    logger.info("Archived %s submissions of class %s", archived, class_id)
+    return archived
+
+
+def archived_submissions(queryset):
+    """Rebuild unsaved ``Submission`` instances from archived rows."""
+    submissions = []
+    for row in queryset.select_related('assignment__class_assigned', 'question'):
+        payload = unpack(row.data)
+        submission = Submission(
+            id=row.id,
+            student_id=row.student_id,
+            assignment=row.assignment,
+            question=row.question,
+            code=payload['code'],
+            status=row.status,
+            feedback=payload['feedback'],
+            submitted_at=row.submitted_at,
+            updated_at=parse_datetime(payload['updated_at']),
+        )
+        submission.teacher_feedback = payload['teacher_feedback']
+        submissions.append(submission)
+    return submissions
@@ -0,0 +1,14 @@
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+
+from . import revocation
+
+
+class RevocationAwareJWTAuthentication(JWTAuthentication):
+    """``JWTAuthentication`` that also rejects revoked tokens (see revocation.py)."""
+
+    def get_validated_token(self, raw_token):
+        token = super().get_validated_token(raw_token)
+        if revocation.is_revoked(token):
+            raise InvalidToken({"detail": "Token has been revoked.", "code": "token_revoked"})
+        return token
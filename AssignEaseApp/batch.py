@@ -0,0 +1,117 @@
+"""
+In-process execution of batched API calls.
+
+A page that needs several endpoints can POST them to ``batch/`` as one list.
+The batch request is authenticated once; each sub-request is resolved
+against ``AssignEaseApp.urls`` and handed straight to its view with the
+already authenticated user, skipping the middleware stack and a second JWT
+check. Identical safe sub-requests are answered once per batch.
+"""
+import io
+import json
+import logging
+
+from django.http import HttpRequest, QueryDict
+from django.urls import Resolver404, resolve
+
+logger = logging.getLogger(__name__)
+
+URLCONF = 'AssignEaseApp.urls'
+API_PREFIX = '/api/'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+ALLOWED_METHODS = SAFE_METHODS + ('POST', 'PUT', 'PATCH', 'DELETE')
+# Sub-requests may not re-enter the batch endpoint or hand out tokens.
+EXCLUDED_URL_NAMES = {'batch', 'token_obtain_pair', 'token_refresh', 'token_revoke', 'register'}
+
+
+def _error(status_code, message):
+    return {'status': status_code, 'body': {'error': message}}
+
+
+def _build_request(request, method, path, query, body):
+    payload = json.dumps(body).encode() if body is not None else b''
+    sub_request = HttpRequest()
+    sub_request.method = method
+    sub_request.path = sub_request.path_info = API_PREFIX + path
+    sub_request.META = {key: value for key, value in request.META.items() if key.startswith('HTTP_')}
+    for key in ('SERVER_NAME', 'SERVER_PORT', 'REMOTE_ADDR', 'wsgi.url_scheme'):
+        if key in request.META:
+            sub_request.META[key] = request.META[key]
+    sub_request.META.update({
+        'REQUEST_METHOD': method,
+        'PATH_INFO': sub_request.path_info,
+        'QUERY_STRING': query,
+        'CONTENT_TYPE': 'application/json',
+        'CONTENT_LENGTH': str(len(payload)),
+    })
+    sub_request.GET = QueryDict(query)
+    sub_request._stream = io.BytesIO(payload)
+    sub_request._read_started = False
+    # DRF authenticates requests carrying these with ForcedAuthentication.
+    sub_request.user = request.user
+    sub_request._force_auth_user = request.user
+    sub_request._force_auth_token = request.auth
+    return sub_request
+
+
+def _response_body(response):
+    if getattr(response, 'streaming', False):
+        return None
+    if hasattr(response, 'data'):
+        return response.data
+    content = response.content.decode(response.charset or 'utf-8')
+    if response.get('Content-Type', '').startswith('application/json'):
+        return json.loads(content) if content else None
+    return content
+
+
+def run_one(request, item):
+    if not isinstance(item, dict):
+        return _error(400, "Each request must be an object with 'method' and 'path'.")
+    method = str(item.get('method', 'GET')).upper()
+    if method not in ALLOWED_METHODS:
+        return _error(405, f"Method {method} is not allowed.")
+
+    path, _, query = str(item.get('path', '')).partition('?')
+    path = path.lstrip('/')
+    if path.startswith(API_PREFIX.lstrip('/')):
+        path = path[len(API_PREFIX) - 1:]
+    try:
+        match = resolve('/' + path, urlconf=URLCONF)
+    except Resolver404:
+        return _error(404, f"No endpoint matches '{path}'.")
+    if match.url_name in EXCLUDED_URL_NAMES:
+        return _error(400, f"'{path}' cannot be called inside a batch.")
+
+    sub_request = _build_request(request, method, path, query, item.get('body'))
+    sub_request.resolver_match = match
+    try:
+        response = match.func(sub_request, *match.args, **match.kwargs)
+    except Exception:
+        logger.exception("Batched %s %s failed", method, path)
+        return _error(500, "Internal server error.")
+    if getattr(response, 'streaming', False):
+        return _error(400, f"'{path}' streams its response and cannot be called inside a batch.")
+    return {'status': response.status_code, 'body': _response_body(response)}
+
+
+def run_batch(request, items):
+    """Run ``items`` in order and return one result dict per item."""
+    results = []
+    cache = {}
+    for item in items:
+        key = None
+        if isinstance(item, dict) and str(item.get('method', 'GET')).upper() in SAFE_METHODS:
+            key = (str(item.get('method', 'GET')).upper(), str(item.get('path', '')).lstrip('/'))
+        if key is not None and key in cache:
+            results.append(cache[key])
+            continue
+
+        result = run_one(request, item)
+        if key is None:
+            # A write may change what earlier reads returned.
+            cache.clear()
+        elif result['status'] < 400:
+            cache[key] = result
+        results.append(result)
+    return results
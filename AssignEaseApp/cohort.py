@@ -0,0 +1,219 @@
+"""
+Bulk account import for a whole intake.
+
+Registering students one request at a time spends nearly all of its time
+in PBKDF2. ``import_cohort`` validates a CSV up front, hashes every
+password in a process pool across all cores, then inserts ``User`` and
+``Profile`` rows with ``bulk_create`` in batches, optionally enrolling the
+new students into a class in the same pass.
+
+``manage.py import_cohort`` runs it in the foreground. The upload endpoint
+hands it to ``import_cohort_in_background``, which keeps the job and its
+report in a ``CohortImport`` row for the teacher to collect from any worker.
+"""
+import csv
+import logging
+import os
+from datetime import timedelta
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.db import DatabaseError, connections, transaction
+from django.utils import timezone
+from django.utils.crypto import get_random_string
+
+from . import leaderboard, todo
+from .counters import adjust_student_count
+from .models import Profile, ClassStudent, CohortImport
+
+logger = logging.getLogger(__name__)
+
+COLUMNS = ['name', 'username', 'email', 'enrollment_number', 'tid', 'role', 'password']
+# Columns stored as-is in a model field, checked with that field's validators (length included).
+FIELD_COLUMNS = {
+    'username': (User, 'username'),
+    'email': (User, 'email'),
+    'name': (Profile, 'name'),
+    'enrollment_number': (Profile, 'enrollment_number'),
+    'tid': (Profile, 'tid'),
+}
+DEFAULT_BATCH_SIZE = 500
+GENERATED_PASSWORD_LENGTH = 12
+# Below this many rows a process pool costs more than it saves.
+POOL_THRESHOLD = 8
+
+
+def read_csv(file):
+    """Yield ``(line number, row)`` pairs from a text file with a header row."""
+    reader = csv.DictReader(file)
+    missing = {'name', 'username', 'email', 'role'} - set(reader.fieldnames or [])
+    if missing:
+        raise ValueError(f"Missing CSV columns: {', '.join(sorted(missing))}")
+    for row in reader:
+        yield reader.line_num, {column: (row.get(column) or '').strip() for column in COLUMNS}
+
+
+def _validate(entries):
+    roles = dict(Profile.USER_ROLES)
+    seen = set()
+    for entry in entries:
+        row, errors = entry['data'], entry['errors']
+        if not row['username']:
+            errors.append("username is required.")
+        elif row['username'] in seen:
+            errors.append("username appears more than once in the file.")
+        seen.add(row['username'])
+        if not row['name']:
+            errors.append("name is required.")
+        if row['role'] not in roles:
+            errors.append(f"role must be one of: {', '.join(roles)}.")
+        if not row['email']:
+            errors.append("email is required.")
+        for column, (model, name) in FIELD_COLUMNS.items():
+            if not row[column]:
+                continue
+            try:
+                model._meta.get_field(name).run_validators(row[column])
+            except ValidationError as e:
+                errors.extend(f"{column}: {message}" for message in e.messages)
+
+    usernames = [entry['data']['username'] for entry in entries if not entry['errors']]
+    taken = set()
+    for start in range(0, len(usernames), DEFAULT_BATCH_SIZE):
+        taken.update(User.objects.filter(username__in=usernames[start:start + DEFAULT_BATCH_SIZE])
+                     .values_list('username', flat=True))
+    for entry in entries:
+        if entry['data']['username'] in taken:
+            entry['errors'].append("username already exists.")
+
+
+def _hash_passwords(passwords, workers=None, executor=ProcessPoolExecutor):
+    if len(passwords) < POOL_THRESHOLD or workers == 1:
+        return [make_password(password) for password in passwords]
+    workers = workers or os.cpu_count() or 1
+    with executor(max_workers=workers) as pool:
+        return list(pool.map(make_password, passwords, chunksize=max(1, len(passwords) // (workers * 4))))
+
+
+def _insert(batch, class_assigned):
+    users = [
+        User(username=entry['data']['username'], email=entry['data']['email'], password=entry['hash'])
+        for entry in batch
+    ]
+    with transaction.atomic():
+        User.objects.bulk_create(users)
+        # MySQL does not return primary keys from bulk_create, so look them up.
+        ids = dict(User.objects.filter(username__in=[user.username for user in users]).values_list('username', 'id'))
+        Profile.objects.bulk_create([
+            Profile(
+                user_id=ids[entry['data']['username']],
+                role=entry['data']['role'],
+                name=entry['data']['name'],
+                enrollment_number=entry['data']['enrollment_number'] or None,
+                tid=entry['data']['tid'] or None,
+            )
+            for entry in batch
+        ])
+        students = [entry for entry in batch if entry['data']['role'] == 'student']
+        if class_assigned is not None and students:
+            ClassStudent.objects.bulk_create([
+                ClassStudent(student_id=ids[entry['data']['username']], class_assigned=class_assigned)
+                for entry in students
+            ])
+            adjust_student_count(class_assigned.pk, len(students))
+            todo.students_enrolled(class_assigned.pk, [ids[entry['data']['username']] for entry in students])
+            leaderboard.students_enrolled(class_assigned.pk, [ids[entry['data']['username']] for entry in students])
+            for entry in students:
+                entry['enrolled'] = True
+    for entry in batch:
+        entry['user_id'] = ids[entry['data']['username']]
+
+
+def import_cohort(rows, class_assigned=None, batch_size=DEFAULT_BATCH_SIZE, workers=None,
+                  executor=ProcessPoolExecutor):
+    """
+    Create the accounts described by ``rows`` (``(line number, row)`` pairs).
+
+    Returns one report dict per row. Rows that fail validation or whose
+    batch fails to insert are reported as errors; the others are created.
+    Generated passwords are only ever returned in the report. ``executor``
+    is the pool class used to hash passwords.
+    """
+    entries = [
+        {'line': line, 'data': row, 'errors': [], 'generated_password': None, 'user_id': None, 'enrolled': False}
+        for line, row in rows
+    ]
+    _validate(entries)
+    valid = [entry for entry in entries if not entry['errors']]
+
+    for entry in valid:
+        if not entry['data']['password']:
+            entry['generated_password'] = entry['data']['password'] = get_random_string(GENERATED_PASSWORD_LENGTH)
+    passwords = [entry['data']['password'] for entry in valid]
+    for entry, hashed in zip(valid, _hash_passwords(passwords, workers, executor)):
+        entry['hash'] = hashed
+
+    for start in range(0, len(valid), batch_size):
+        batch = valid[start:start + batch_size]
+        try:
+            _insert(batch, class_assigned)
+        except DatabaseError as e:
+            for entry in batch:
+                entry['errors'].append(f"could not be created: {e}")
+
+    return [
+        {
+            'line': entry['line'],
+            'username': entry['data']['username'],
+            'status': 'error' if entry['errors'] else 'created',
+            'user_id': entry['user_id'],
+            'enrolled': entry['enrolled'],
+            'password': entry['generated_password'] if not entry['errors'] else None,
+            'errors': entry['errors'],
+        }
+        for entry in entries
+    ]
+
+
+def _expires_at():
+    return timezone.now() + timedelta(seconds=settings.COHORT_IMPORT_REPORT_SECONDS)
+
+
+def find_import(job_id, owner_id):
+    """The unexpired ``CohortImport`` ``job_id`` of ``owner_id``, or None."""
+    return CohortImport.objects.filter(pk=job_id, owner_id=owner_id, expires_at__gt=timezone.now()).first()
+
+
+def import_cohort_in_background(rows, class_assigned, owner_id):
+    """
+    Run ``import_cohort`` on a daemon thread and return the job id.
+
+    The job's state, and once finished its report, is kept in a
+    ``CohortImport`` row for ``COHORT_IMPORT_REPORT_SECONDS``; expired rows
+    are deleted when the next import starts. Hashing uses threads rather
+    than forking the web worker; PBKDF2 releases the GIL.
+    """
+    CohortImport.objects.filter(expires_at__lte=timezone.now()).delete()
+    job = CohortImport.objects.create(owner_id=owner_id, expires_at=_expires_at())
+    jobs = CohortImport.objects.filter(pk=job.pk)
+
+    def run():
+        try:
+            report = import_cohort(rows, class_assigned, executor=ThreadPoolExecutor)
+        except Exception:
+            logger.exception("Background cohort import %s failed", job.pk.hex)
+            jobs.update(status='failed', expires_at=_expires_at())
+        else:
+            # The report is kept for the full period from the end of the import.
+            jobs.update(status='done', report=report, expires_at=_expires_at())
+        finally:
+            connections.close_all()
+
+    thread = threading.Thread(target=run, name=f"cohort-import-{job.pk.hex}", daemon=True)
+    # The thread reads the job through its own connection, so start it once the row is committed.
+    transaction.on_commit(thread.start)
+    return job.pk.hex
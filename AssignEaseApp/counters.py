@@ -0,0 +1,102 @@
+"""
+Denormalized counters on ``Class`` and ``Assignment``.
+
+``Class.student_count`` and the per-status ``Assignment.*_count`` columns are
+kept in step with ``ClassStudent`` and ``Submission`` by atomic ``F()``
+updates. Single-row saves and deletes are handled by the receivers in
+``signals.py``; bulk write paths call the helpers below directly. Archived
+submissions keep counting towards their assignment. ``reconcile`` finds and
+repairs any drift.
+"""
+from django.db import transaction
+from django.db.models import Count, F
+
+from .models import Class, ClassStudent, Assignment, Submission, ArchivedSubmission
+
+STATUS_COUNTERS = {
+    'submitted': 'submitted_count',
+    'checked': 'checked_count',
+    'reassigned': 'reassigned_count',
+    'rejected': 'rejected_count',
+}
+
+
+def _adjust(queryset, field, delta):
+    if delta < 0:
+        # Never drive a counter below zero; reconcile() repairs the drift instead.
+        queryset = queryset.filter(**{f'{field}__gte': -delta})
+    queryset.update(**{field: F(field) + delta})
+
+
+def adjust_student_count(class_id, delta):
+    if class_id and delta:
+        _adjust(Class.all_objects.filter(pk=class_id), 'student_count', delta)
+
+
+def adjust_status_count(assignment_id, status, delta):
+    field = STATUS_COUNTERS.get(status)
+    if assignment_id and field and delta:
+        _adjust(Assignment.objects.filter(pk=assignment_id), field, delta)
+
+
+def submission_moved(old, new):
+    """Move one submission between ``(assignment_id, status)`` buckets."""
+    if old == new:
+        return
+    if old is not None:
+        adjust_status_count(*old, -1)
+    if new is not None:
+        adjust_status_count(*new, 1)
+
+
+def _drift(model, manager_rows, actual, fields, fix):
+    drift = []
+    for row in manager_rows:
+        pk = row.pop('pk')
+        expected = {field: actual.get((pk, field), 0) for field in fields}
+        if expected != row:
+            drift.append((model.__name__, pk, row, expected))
+            if fix:
+                model._base_manager.filter(pk=pk).update(**expected)
+    return drift
+
+
+def reconcile(fix=False, batch_size=1000):
+    """
+    Compare every counter with a fresh ``COUNT(*)``.
+
+    Returns ``(model name, pk, stored, actual)`` for each drifted row and,
+    when ``fix`` is true, overwrites the stored values.
+    """
+    drift = []
+
+    class_ids = list(Class.objects.order_by('pk').values_list('pk', flat=True))
+    for start in range(0, len(class_ids), batch_size):
+        ids = class_ids[start:start + batch_size]
+        actual = {
+            (row['class_assigned'], 'student_count'): row['total']
+            for row in ClassStudent.objects.filter(class_assigned__in=ids)
+            .values('class_assigned').annotate(total=Count('pk'))
+        }
+        with transaction.atomic():
+            rows = Class.objects.select_for_update().filter(pk__in=ids).values('pk', 'student_count')
+            drift += _drift(Class, rows, actual, ['student_count'], fix)
+
+    fields = list(STATUS_COUNTERS.values())
+    assignment_ids = list(Assignment.objects.order_by('pk').values_list('pk', flat=True))
+    for start in range(0, len(assignment_ids), batch_size):
+        ids = assignment_ids[start:start + batch_size]
+        actual = {}
+        for model in (Submission, ArchivedSubmission):
+            for row in (
+                model.objects.filter(assignment__in=ids)
+                .values('assignment', 'status').annotate(total=Count('pk'))
+            ):
+                if row['status'] in STATUS_COUNTERS:
+                    key = (row['assignment'], STATUS_COUNTERS[row['status']])
+                    actual[key] = actual.get(key, 0) + row['total']
+        with transaction.atomic():
+            rows = Assignment.objects.select_for_update().filter(pk__in=ids).values('pk', *fields)
+            drift += _drift(Assignment, rows, actual, fields, fix)
+
+    return drift
@@ -0,0 +1,127 @@
+"""
+Batched purge of soft-deleted classes.
+
+Deleting a class used to run Django's cascade collector over every
+dependent row in one transaction. ``DeleteClassView`` now only stamps
+``Class.deleted_at``; the rows are removed here, bottom-up, in bounded
+batches of raw deletes. Every step is idempotent, so a purge that crashed
+half way is resumed by running it again.
+"""
+import logging
+import threading
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import connections, transaction
+from django.utils import timezone
+
+from .models import (
+    Class, ClassStudent, Assignment, AssignmentQuestion, Submission, TeacherFeedback, ArchivedSubmission,
+    SubmissionRevision, PendingAssignment, SubmissionFile, SubmissionActivity, LeaderboardEntry,
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+def delete_stored_files(ids):
+    for name in SubmissionFile._base_manager.filter(pk__in=ids).values_list('file', flat=True):
+        default_storage.delete(name)
+
+
+# (label, callable returning the rows of one class to delete, optional hook
+# called with each batch of ids before it is deleted), children first.
+PURGE_PLAN = [
+    ('teacher feedback', lambda class_id: TeacherFeedback._base_manager.filter(
+        submission__assignment__class_assigned_id=class_id), None),
+    # Revisions and files have no foreign key constraint, so match both hot and archived submissions.
+    ('submission revisions', lambda class_id: SubmissionRevision._base_manager.filter(
+        submission_id__in=Submission._base_manager.filter(
+            assignment__class_assigned_id=class_id).values('pk')), None),
+    ('archived submission revisions', lambda class_id: SubmissionRevision._base_manager.filter(
+        submission_id__in=ArchivedSubmission._base_manager.filter(
+            assignment__class_assigned_id=class_id).values('pk')), None),
+    ('submission files', lambda class_id: SubmissionFile._base_manager.filter(
+        submission_id__in=Submission._base_manager.filter(
+            assignment__class_assigned_id=class_id).values('pk')), delete_stored_files),
+    ('archived submission files', lambda class_id: SubmissionFile._base_manager.filter(
+        submission_id__in=ArchivedSubmission._base_manager.filter(
+            assignment__class_assigned_id=class_id).values('pk')), delete_stored_files),
+    ('submissions', lambda class_id: Submission._base_manager.filter(
+        assignment__class_assigned_id=class_id), None),
+    ('archived submissions', lambda class_id: ArchivedSubmission._base_manager.filter(
+        assignment__class_assigned_id=class_id), None),
+    ('submission activity', lambda class_id: SubmissionActivity._base_manager.filter(
+        class_assigned_id=class_id), None),
+    ('leaderboard entries', lambda class_id: LeaderboardEntry._base_manager.filter(
+        class_assigned_id=class_id), None),
+    ('assignment questions', lambda class_id: AssignmentQuestion._base_manager.filter(
+        assignment__class_assigned_id=class_id), None),
+    ('pending assignments', lambda class_id: PendingAssignment._base_manager.filter(
+        class_assigned_id=class_id), None),
+    ('assignments', lambda class_id: Assignment._base_manager.filter(class_assigned_id=class_id), None),
+    ('class students', lambda class_id: ClassStudent._base_manager.filter(class_assigned_id=class_id), None),
+]
+
+
+def soft_delete_class(class_instance):
+    """Hide a class right away and schedule the purge of its rows."""
+    class_instance.deleted_at = timezone.now()
+    class_instance.save(update_fields=['deleted_at'])
+    if settings.PURGE_DELETED_CLASSES_IN_BACKGROUND:
+        transaction.on_commit(lambda: purge_class_in_background(class_instance.pk))
+
+
+def purge_class(class_id, batch_size=DEFAULT_BATCH_SIZE, progress=None):
+    """
+    Delete a soft-deleted class and everything under it.
+
+    ``progress`` is called as ``progress(class_id, label, deleted_so_far)``
+    after every batch. Returns the total number of rows deleted.
+    """
+    total = 0
+    for label, rows_for, before_delete in PURGE_PLAN:
+        deleted = 0
+        while True:
+            queryset = rows_for(class_id)
+            ids = list(queryset.values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                break
+            if before_delete:
+                before_delete(ids)
+            with transaction.atomic(using=queryset.db):
+                deleted += queryset.model._base_manager.filter(pk__in=ids)._raw_delete(queryset.db)
+            if progress:
+                progress(class_id, label, deleted)
+        total += deleted
+
+    total += Class.all_objects.filter(pk=class_id, deleted_at__isnull=False).delete()[0]
+    logger.info("Purged class %s (%s rows)", class_id, total)
+    return total
+
+
+def purge_deleted_classes(batch_size=DEFAULT_BATCH_SIZE, progress=None):
+    """Purge every class that is marked deleted but still has rows."""
+    pending = Class.all_objects.filter(deleted_at__isnull=False).values_list('pk', flat=True)
+    return {class_id: purge_class(class_id, batch_size, progress) for class_id in list(pending)}
+
+
+def purge_class_in_background(class_id, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Run ``purge_class`` on a daemon thread.
+
+    Nothing is lost if the process dies mid-way: the class stays marked
+    deleted and ``manage.py purge_deleted_classes`` finishes the job.
+    """
+    def run():
+        try:
+            purge_class(class_id, batch_size)
+        except Exception:
+            logger.exception("Background purge of class %s failed", class_id)
+        finally:
+            connections.close_all()
+
+    thread = threading.Thread(target=run, name=f"purge-class-{class_id}", daemon=True)
+    thread.start()
+    return thread
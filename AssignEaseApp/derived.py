@@ -0,0 +1,25 @@
+"""
+Shared plumbing for the tables derived from submissions.
+
+``rollups.py`` and ``leaderboard.py`` each recompute one class with their
+own ``rebuild_class``; ``rebuild_classes`` walks the classes for either.
+"""
+from .models import Class
+
+
+def rebuild_classes(rebuild_class, class_ids=None, progress=None):
+    """
+    Call ``rebuild_class(class_id)`` for the given classes, or every live
+    class, one at a time; returns how many were rebuilt.
+
+    ``progress(class_id, result)`` is called after each class.
+    """
+    if class_ids is None:
+        class_ids = Class.objects.order_by('pk').values_list('pk', flat=True).iterator()
+    done = 0
+    for class_id in class_ids:
+        result = rebuild_class(class_id)
+        done += 1
+        if progress:
+            progress(class_id, result)
+    return done
@@ -0,0 +1,251 @@
+"""
+Request-scoped identity map.
+
+Inside ``scope()`` (``IdentityMapMiddleware`` opens one per request when
+``IDENTITY_MAP_ENABLED`` is set) a ``get()`` by primary key or one-to-one
+key through an ``IdentityMapManager`` is answered from memory once the row
+has been loaded in the same request, and rows loaded by those managers get
+their foreign keys pointed at instances already in the map. Every write
+through the managers, and every save or delete of a mapped model (see
+``signals.py``), empties the map, and so does the rollback of a transaction
+that loaded a mapped row. Outside a scope nothing is cached and the
+managers behave like plain ones.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
+from django.db.models import Q
+from django.db.models.query import ModelIterable
+
+_map = ContextVar('identity_map', default=None)
+_key_fields = {}
+_related_fields = {}
+
+
+def activate():
+    return _map.set({})
+
+
+def deactivate(token):
+    _map.reset(token)
+
+
+@contextmanager
+def scope():
+    token = activate()
+    try:
+        yield
+    finally:
+        deactivate(token)
+
+
+def clear():
+    current = _map.get()
+    if current:
+        current.clear()
+
+
+class _Loaded:
+    """``on_commit`` marker for rows mapped inside a transaction; Django drops it on rollback."""
+
+    def __init__(self, using):
+        self.using = using
+        self.committed = False
+
+    def __call__(self):
+        self.committed = True
+
+    def rolled_back(self):
+        if self.committed:
+            return False
+        connection = transaction.get_connection(self.using)
+        return not any(callback is self for _, callback, _ in connection.run_on_commit)
+
+
+def _get(current, key):
+    entry = current.get(key)
+    if entry is None:
+        return None
+    instance, loaded = entry
+    if loaded is not None and loaded.rolled_back():
+        # The row may have been read from a rolled-back write; start over.
+        current.clear()
+        return None
+    return instance
+
+
+def key_fields(model):
+    """Map each lookup that selects a single row of ``model`` to ``(attname, field that parses the value)``."""
+    fields = _key_fields.get(model)
+    if fields is None:
+        pk = model._meta.pk
+        fields = {}
+        for name in ('pk', pk.name, pk.attname):
+            fields[name] = fields[f'{name}__exact'] = (pk.attname, pk)
+        for field in model._meta.concrete_fields:
+            if field.one_to_one and not field.primary_key:
+                target = field.target_field
+                for name in (field.name, field.attname, f'{field.name}__pk', f'{field.name}__{target.name}'):
+                    fields[name] = fields[f'{name}__exact'] = (field.attname, target)
+        _key_fields[model] = fields
+    return fields
+
+
+def _key(model, args, kwargs):
+    if args:
+        # Forward foreign key descriptors call get(Q(id=...)).
+        if len(args) != 1 or kwargs or not isinstance(args[0], Q):
+            return None
+        q = args[0]
+        if q.negated or len(q.children) != 1 or not isinstance(q.children[0], tuple):
+            return None
+        kwargs = dict(q.children)
+    if len(kwargs) != 1:
+        return None
+    (name, value), = kwargs.items()
+    model = model._meta.concrete_model
+    lookup = key_fields(model).get(name)
+    if lookup is None:
+        return None
+    attname, field = lookup
+    if isinstance(value, models.Model):
+        value = value.pk
+    try:
+        value = field.to_python(value)
+    except (ValidationError, TypeError, ValueError):
+        return None
+    return None if value is None else (model, attname, value)
+
+
+def lookup(model, *args, **kwargs):
+    current = _map.get()
+    if not current:
+        return None
+    key = _key(model, args, kwargs)
+    return _get(current, key) if key is not None else None
+
+
+def add(instance):
+    current = _map.get()
+    if current is None or instance.pk is None:
+        return
+    model = instance._meta.concrete_model
+    using = instance._state.db
+    loaded = None
+    if transaction.get_connection(using).in_atomic_block:
+        loaded = _Loaded(using)
+        transaction.on_commit(loaded, using=using)
+    for attname, _ in set(key_fields(model).values()):
+        value = instance.__dict__.get(attname)
+        if value is not None:
+            current[(model, attname, value)] = (instance, loaded)
+
+
+def attach(instances):
+    """Point unloaded foreign keys of ``instances`` at instances already in the map."""
+    current = _map.get()
+    if not current:
+        return
+    for instance in instances:
+        model = type(instance)
+        fields = _related_fields.get(model)
+        if fields is None:
+            fields = _related_fields[model] = [
+                (field, field.related_model._meta.concrete_model, field.target_field.attname)
+                for field in model._meta.concrete_fields
+                if field.is_relation and (field.many_to_one or field.one_to_one)
+            ]
+        for field, related_model, target in fields:
+            value = instance.__dict__.get(field.attname)
+            if value is None or field.is_cached(instance):
+                continue
+            related = _get(current, (related_model, target, value))
+            if related is not None:
+                field.set_cached_value(instance, related)
+
+
+def loads_full_rows(queryset):
+    query = queryset.query
+    return (
+        queryset._iterable_class is ModelIterable
+        and not query.annotations
+        and not query.extra
+        and query.deferred_loading == (frozenset(), True)
+    )
+
+
+def fetch(queryset, **kwargs):
+    """``queryset.get(**kwargs)`` through the map, for models without an ``IdentityMapManager``."""
+    plain = not queryset.query.where and loads_full_rows(queryset)
+    if plain:
+        instance = lookup(queryset.model, **kwargs)
+        if instance is not None:
+            return instance
+    instance = queryset.get(**kwargs)
+    if plain:
+        add(instance)
+    return instance
+
+
+class IdentityMapQuerySet(models.QuerySet):
+    # Set on the manager's base queryset and kept by all(): only lookups that
+    # could have been answered by the manager itself are served from the map.
+    _identity_lookup = False
+
+    def accepts(self, instance):
+        """Whether a mapped instance may be returned by this manager."""
+        return True
+
+    def all(self):
+        clone = super().all()
+        clone._identity_lookup = self._identity_lookup
+        return clone
+
+    def get(self, *args, **kwargs):
+        if self._identity_lookup:
+            instance = lookup(self.model, *args, **kwargs)
+            if instance is not None and self.accepts(instance):
+                return instance
+        instance = super().get(*args, **kwargs)
+        if loads_full_rows(self):
+            add(instance)
+        return instance
+
+    def _fetch_all(self):
+        loaded = self._result_cache is None
+        super()._fetch_all()
+        if loaded and self._iterable_class is ModelIterable:
+            attach(self._result_cache)
+
+    def update(self, **kwargs):
+        clear()
+        return super().update(**kwargs)
+
+    def _update(self, values):
+        clear()
+        return super()._update(values)
+
+    def delete(self):
+        clear()
+        return super().delete()
+
+    def _raw_delete(self, using):
+        clear()
+        return super()._raw_delete(using)
+
+    def bulk_create(self, *args, **kwargs):
+        clear()
+        return super().bulk_create(*args, **kwargs)
+
+    def bulk_update(self, *args, **kwargs):
+        clear()
+        return super().bulk_update(*args, **kwargs)
+
+
+class IdentityMapManager(models.Manager.from_queryset(IdentityMapQuerySet)):
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        queryset._identity_lookup = True
+        return queryset
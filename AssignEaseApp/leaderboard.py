@@ -0,0 +1,176 @@
+"""
+Per-class leaderboard.
+
+``LeaderboardEntry`` keeps one row per enrolled student with their checked,
+on-time and total submission counts and a ``score`` derived from them.
+Entries are adjusted under a row lock as submissions change status and
+appear or disappear, created and removed as students join and leave, and
+ranked through the ``leaderboard_rank`` index on (class, score, student), so
+no query ever re-reads a class's submissions. Single-row changes arrive
+through the receivers in ``signals.py``; bulk write paths call these helpers
+directly. Archived submissions keep counting. ``rebuild`` recomputes
+classes from scratch.
+"""
+from datetime import timezone as dt_timezone
+
+from django.db import transaction
+from django.db.models import Q
+
+from .derived import rebuild_classes
+from .models import ClassStudent, Submission, ArchivedSubmission, LeaderboardEntry
+
+BATCH_SIZE = 1000
+
+
+def score(checked, on_time, total):
+    """Checked submissions first; the on-time rate, in thousandths, breaks ties."""
+    rate = on_time * 1000 // total if total else 0
+    return checked * 1001 + rate
+
+
+def is_on_time(submitted_at, due_date):
+    return submitted_at is not None and submitted_at.astimezone(dt_timezone.utc).date() <= due_date
+
+
+def apply(class_id, student_id, checked=0, on_time=0, total=0):
+    """Add the deltas to one entry; students without an entry are not enrolled and are skipped."""
+    if not (checked or on_time or total):
+        return
+    with transaction.atomic():
+        entry = LeaderboardEntry.objects.select_for_update().filter(
+            class_assigned_id=class_id, student_id=student_id,
+        ).first()
+        if entry is None:
+            return
+        entry.checked_count = max(0, entry.checked_count + checked)
+        entry.on_time_count = max(0, entry.on_time_count + on_time)
+        entry.submission_count = max(0, entry.submission_count + total)
+        entry.score = score(entry.checked_count, entry.on_time_count, entry.submission_count)
+        entry.save(update_fields=['checked_count', 'on_time_count', 'submission_count', 'score', 'updated_at'])
+
+
+def submission_moved(student_id, submitted_at, old, new, assignments):
+    """
+    Move one submission between ``(assignment_id, status)`` buckets, like ``counters.submission_moved``.
+
+    ``assignments`` maps the assignment ids involved to ``(class_id, due_date)``.
+    """
+    if old == new:
+        return
+    deltas = {}
+    for key, sign in ((old, -1), (new, 1)):
+        if key is None or key[0] not in assignments:
+            continue
+        class_id, due_date = assignments[key[0]]
+        delta = deltas.setdefault(class_id, {'checked': 0, 'on_time': 0, 'total': 0})
+        delta['checked'] += sign * (key[1] == 'checked')
+        delta['on_time'] += sign * is_on_time(submitted_at, due_date)
+        delta['total'] += sign
+    for class_id in sorted(deltas):
+        apply(class_id, student_id, **deltas[class_id])
+
+
+def _counts(class_id, student_ids=None):
+    """``{student_id: [checked, on_time, total]}`` from the class's hot and archived submissions."""
+    counts = {}
+    for model in (Submission, ArchivedSubmission):
+        rows = model._base_manager.filter(assignment__class_assigned_id=class_id)
+        if student_ids is not None:
+            rows = rows.filter(student_id__in=student_ids)
+        for student_id, status, submitted_at, due_date in rows.values_list(
+            'student_id', 'status', 'submitted_at', 'assignment__due_date',
+        ).iterator(chunk_size=BATCH_SIZE):
+            count = counts.setdefault(student_id, [0, 0, 0])
+            count[0] += status == 'checked'
+            count[1] += is_on_time(submitted_at, due_date)
+            count[2] += 1
+    return counts
+
+
+def _entries(class_id, student_ids, counts):
+    entries = []
+    for student_id in student_ids:
+        checked, on_time, total = counts.get(student_id, (0, 0, 0))
+        entries.append(LeaderboardEntry(
+            class_assigned_id=class_id, student_id=student_id, checked_count=checked,
+            on_time_count=on_time, submission_count=total, score=score(checked, on_time, total),
+        ))
+    return entries
+
+
+def students_enrolled(class_id, student_ids):
+    student_ids = list(student_ids)
+    if student_ids:
+        LeaderboardEntry.objects.bulk_create(
+            _entries(class_id, student_ids, _counts(class_id, student_ids)),
+            batch_size=BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+
+
+def student_unenrolled(class_id, student_id):
+    LeaderboardEntry.objects.filter(class_assigned_id=class_id, student_id=student_id).delete()
+
+
+def rebuild_class(class_id):
+    """Recompute one class's entries; returns how many there are."""
+    student_ids = list(ClassStudent.objects.filter(class_assigned_id=class_id).values_list('student_id', flat=True))
+    entries = _entries(class_id, student_ids, _counts(class_id))
+    with transaction.atomic():
+        LeaderboardEntry.objects.filter(class_assigned_id=class_id).delete()
+        LeaderboardEntry.objects.bulk_create(entries, batch_size=BATCH_SIZE)
+    return len(entries)
+
+
+def rebuild(class_ids=None, progress=None):
+    """``rebuild_class`` for each class (see ``derived.rebuild_classes``)."""
+    return rebuild_classes(rebuild_class, class_ids, progress)
+
+
+# Ranking. Ties on score are broken by the higher student id so every query
+# reads the leaderboard_rank index in a single direction.
+
+def _rows(entries, first_rank):
+    return [
+        {
+            "rank": first_rank + offset,
+            "student": entry.student_id,
+            "name": getattr(getattr(entry.student, 'profile', None), 'name', None),
+            "checked_count": entry.checked_count,
+            "on_time_rate": round(entry.on_time_count / entry.submission_count, 3) if entry.submission_count else None,
+            "submission_count": entry.submission_count,
+            "score": entry.score,
+        }
+        for offset, entry in enumerate(entries)
+    ]
+
+
+def _board(class_id):
+    return LeaderboardEntry.objects.filter(class_assigned_id=class_id).select_related('student__profile')
+
+
+def top(class_id, limit):
+    return _rows(_board(class_id).order_by('-score', '-student_id')[:limit], 1)
+
+
+def standing(class_id, student_id, around=0):
+    """
+    A student's rank plus ``around`` entries on either side, or None if the
+    student has no entry in the class.
+    """
+    entry = _board(class_id).filter(student_id=student_id).first()
+    if entry is None:
+        return None
+    ahead = Q(score__gt=entry.score) | Q(score=entry.score, student_id__gt=entry.student_id)
+    rank = LeaderboardEntry.objects.filter(ahead, class_assigned_id=class_id).count() + 1
+    above = list(_board(class_id).filter(ahead).order_by('score', 'student_id')[:around])[::-1] if around else []
+    below = list(
+        _board(class_id).filter(Q(score__lt=entry.score) | Q(score=entry.score, student_id__lt=entry.student_id))
+        .order_by('-score', '-student_id')[:around]
+    ) if around else []
+    return {
+        "rank": rank,
+        "entry": _rows([entry], rank)[0],
+        "above": _rows(above, rank - len(above)),
+        "below": _rows(below, rank + 1),
+    }
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from AssignEaseApp.archive import DEFAULT_BATCH_SIZE, archivable_classes, archive_class
+
+
+class Command(BaseCommand):
+    help = (
+        "Move the submissions and teacher feedback of closed or finished classes "
+        "into compressed archive storage."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument('--dry-run', action='store_true', help="Only list the classes that would be archived.")
+
+    def handle(self, *args, **options):
+        classes = list(archivable_classes().values_list('pk', 'class_name'))
+        if not classes:
+            self.stdout.write("No classes to archive.")
+            return
+
+        for class_id, class_name in classes:
+            if options['dry_run']:
+                self.stdout.write(f"class {class_id} ({class_name}) would be archived")
+                continue
+
+            def progress(class_id, archived):
+                self.stdout.write(f"class {class_id}: {archived} submissions archived")
+
+            total = archive_class(class_id, options['batch_size'], progress)
+            self.stdout.write(self.style.SUCCESS(f"class {class_id} ({class_name}): archived {total} submissions"))
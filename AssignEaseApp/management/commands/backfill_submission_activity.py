@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from AssignEaseApp.rollups import backfill
+
+
+class Command(BaseCommand):
+    help = "Recompute the hourly and daily submission activity rollups, one class at a time."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--class', dest='class_ids', type=int, action='append',
+                            help="Only rebuild this class (repeatable).")
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        total = backfill(
+            options['class_ids'],
+            batch_size=options['batch_size'],
+            progress=lambda class_id, rows: self.stdout.write(f"class {class_id}: {rows} rollup rows"),
+        )
+        self.stdout.write(self.style.SUCCESS(f"Backfilled activity for {total} classes."))
@@ -0,0 +1,115 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from AssignEaseApp.models import Profile, Class, ClassStudent, ProgrammingLanguage, Assignment, AssignmentQuestion, Submission
+from AssignEaseApp.projections import submission_rows, class_student_rows
+from AssignEaseApp.renderers import FastJSONRenderer
+from AssignEaseApp.serializers import SubmissionSerializer, ClassStudentSerializer
+
+QUESTIONS_PER_ASSIGNMENT = 10
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure rows per second of the submission and class-student list "
+        "endpoints with the serializer path and with the projection fast path."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--seed', type=int, default=0,
+            help="Insert this many synthetic submissions first. They are rolled back afterwards.",
+        )
+        parser.add_argument('--repeat', type=int, default=3, help="Best-of-N timing runs per path.")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            if options['seed']:
+                self.seed(options['seed'])
+            try:
+                self.compare(
+                    "submissions",
+                    Submission.objects.all(),
+                    lambda qs: SubmissionSerializer(qs, many=True).data,
+                    submission_rows,
+                    options['repeat'],
+                )
+                self.compare(
+                    "classstudents",
+                    ClassStudent.objects.all(),
+                    lambda qs: ClassStudentSerializer(qs, many=True).data,
+                    class_student_rows,
+                    options['repeat'],
+                )
+            finally:
+                transaction.set_rollback(True)
+
+    def compare(self, label, queryset, serialize, project, repeat):
+        baseline, baseline_body = self.measure(queryset, serialize, JSONRenderer(), repeat)
+        fast, fast_body = self.measure(queryset, project, FastJSONRenderer(), repeat)
+        if baseline_body != fast_body:
+            raise CommandError(f"{label}: fast path output differs from the serializer output.")
+
+        rows = queryset.count()
+        self.stdout.write(
+            f"{label}: {rows} rows | serializer {self.rate(rows, baseline)} | "
+            f"projection {self.rate(rows, fast)} | speedup {baseline / fast:.1f}x"
+        )
+
+    def measure(self, queryset, build, renderer, repeat):
+        best = None
+        for _ in range(max(repeat, 1)):
+            started = time.perf_counter()
+            body = renderer.render(build(queryset.all()))
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return max(best, 1e-9), body
+
+    def rate(self, rows, seconds):
+        return f"{rows / seconds:,.0f} rows/s"
+
+    def seed(self, count):
+        tag = timezone.now().strftime('%Y%m%d%H%M%S%f')
+        teacher = User.objects.create(username=f"bench-teacher-{tag}")
+        class_instance = Class.objects.create(class_name=f"Bench {tag}", teacher=teacher)
+        language, _ = ProgrammingLanguage.objects.get_or_create(language_name="Python")
+        assignment = Assignment.objects.create(
+            class_assigned=class_instance, title="Benchmark", description="Synthetic rows",
+            due_date=timezone.now().date(), teacher=teacher, language=language,
+        )
+        AssignmentQuestion.objects.bulk_create(
+            AssignmentQuestion(assignment=assignment, question_text=f"Question {n}")
+            for n in range(QUESTIONS_PER_ASSIGNMENT)
+        )
+        questions = list(AssignmentQuestion.objects.filter(assignment=assignment))
+
+        student_count = -(-count // len(questions))
+        User.objects.bulk_create(
+            User(username=f"bench-{tag}-{n}", email=f"bench-{n}@example.com")
+            for n in range(student_count)
+        )
+        # MySQL does not return primary keys from bulk_create, so re-read them.
+        students = list(User.objects.filter(username__startswith=f"bench-{tag}-"))
+        Profile.objects.bulk_create(
+            Profile(user=student, role='student', name=student.username, enrollment_number=str(student.id))
+            for student in students
+        )
+        ClassStudent.objects.bulk_create(
+            ClassStudent(student=student, class_assigned=class_instance) for student in students
+        )
+        Submission.objects.bulk_create(
+            (
+                Submission(
+                    student=students[n // len(questions)], assignment=assignment,
+                    question=questions[n % len(questions)], code="print('hello, world')\n" * 20,
+                    status='submitted',
+                )
+                for n in range(count)
+            ),
+            batch_size=1000,
+        )
@@ -0,0 +1,50 @@
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+
+from AssignEaseApp.cohort import DEFAULT_BATCH_SIZE, import_cohort, read_csv
+from AssignEaseApp.models import Class
+
+
+class Command(BaseCommand):
+    help = (
+        "Create user accounts from a CSV with the columns name, username, email, "
+        "enrollment_number or tid, role and optionally password."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_file')
+        parser.add_argument('--class', dest='class_id', type=int, help="Enroll the imported students into this class.")
+        parser.add_argument('--report', help="Write the per-row report to this CSV file instead of stdout.")
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument('--workers', type=int, help="Password hashing processes (default: all cores).")
+
+    def handle(self, *args, **options):
+        class_assigned = None
+        if options['class_id']:
+            try:
+                class_assigned = Class.objects.get(pk=options['class_id'])
+            except Class.DoesNotExist:
+                raise CommandError(f"Class {options['class_id']} does not exist.")
+
+        with open(options['csv_file'], newline='', encoding='utf-8-sig') as file:
+            try:
+                report = import_cohort(read_csv(file), class_assigned, options['batch_size'], options['workers'])
+            except ValueError as e:
+                raise CommandError(str(e))
+
+        out = open(options['report'], 'w', newline='') if options['report'] else self.stdout
+        try:
+            writer = csv.writer(out)
+            writer.writerow(['line', 'username', 'status', 'user_id', 'enrolled', 'password', 'errors'])
+            for row in report:
+                writer.writerow([
+                    row['line'], row['username'], row['status'], row['user_id'] or '',
+                    row['enrolled'], row['password'] or '', ' '.join(row['errors']),
+                ])
+        finally:
+            if options['report']:
+                out.close()
+
+        created = sum(row['status'] == 'created' for row in report)
+        self.stderr.write(f"{created} of {len(report)} accounts created.")
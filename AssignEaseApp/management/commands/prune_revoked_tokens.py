@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from AssignEaseApp.revocation import prune
+
+
+class Command(BaseCommand):
+    help = "Delete revoked-token rows whose tokens have expired and can no longer be used."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        deleted = prune(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Pruned {deleted} revoked tokens."))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from AssignEaseApp.deletion import DEFAULT_BATCH_SIZE, purge_deleted_classes
+
+
+class Command(BaseCommand):
+    help = "Purge the rows of classes that were deleted through the API. Safe to re-run after a crash."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        def progress(class_id, label, deleted):
+            self.stdout.write(f"class {class_id}: {deleted} {label} deleted")
+
+        purged = purge_deleted_classes(options['batch_size'], progress)
+        for class_id, total in purged.items():
+            self.stdout.write(self.style.SUCCESS(f"class {class_id}: purged {total} rows"))
+        if not purged:
+            self.stdout.write("No deleted classes to purge.")
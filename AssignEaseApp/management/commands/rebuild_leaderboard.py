@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from AssignEaseApp.leaderboard import rebuild
+
+
+class Command(BaseCommand):
+    help = "Recompute the per-class leaderboards from enrolments and submissions, one class at a time."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--class', dest='class_ids', type=int, action='append',
+                            help="Only rebuild this class (repeatable).")
+
+    def handle(self, *args, **options):
+        total = rebuild(
+            options['class_ids'],
+            progress=lambda class_id, entries: self.stdout.write(f"class {class_id}: {entries} entries"),
+        )
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt the leaderboard for {total} classes."))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from AssignEaseApp.todo import rebuild
+
+
+class Command(BaseCommand):
+    help = "Recompute every student's queue of unsubmitted assignments."
+
+    def handle(self, *args, **options):
+        total = rebuild(lambda done: self.stdout.write(f"{done} assignments synced"))
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt the queue for {total} assignments."))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from AssignEaseApp.counters import reconcile
+
+
+class Command(BaseCommand):
+    help = "Detect, and with --fix repair, drift in the Class and Assignment counter columns."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fix', action='store_true', help="Overwrite drifted counters with the actual counts.")
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        drift = reconcile(fix=options['fix'], batch_size=options['batch_size'])
+        for model, pk, stored, actual in drift:
+            self.stdout.write(f"{model} {pk}: stored {stored}, actual {actual}")
+
+        if not drift:
+            self.stdout.write(self.style.SUCCESS("All counters are correct."))
+        elif options['fix']:
+            self.stdout.write(self.style.SUCCESS(f"Repaired {len(drift)} rows."))
+        else:
+            self.stdout.write(self.style.WARNING(f"{len(drift)} rows drifted; run with --fix to repair."))
@@ -0,0 +1,41 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+
+from . import identity, routers
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Scope ``PrimaryReplicaRouter`` decisions to the current request and pin
+    users who wrote to the primary for ``REPLICA_STICKY_SECONDS``.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = routers.activate(request)
+        state = routers.current_state()
+        try:
+            response = self.get_response(request)
+        finally:
+            routers.deactivate(token)
+
+        user = state.user()
+        if state.wrote and user is not None:
+            cache.set(routers.pin_key(user.pk), True, settings.REPLICA_STICKY_SECONDS)
+        return response
+
+
+class IdentityMapMiddleware:
+    """Give each request its own identity map (see ``identity.py``) when ``IDENTITY_MAP_ENABLED`` is set."""
+
+    def __init__(self, get_response):
+        if not settings.IDENTITY_MAP_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with identity.scope():
+            return self.get_response(request)
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.3 on 2026-10-19 17:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('AssignEaseApp', '0003_classstudent_unique_student_class'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='class',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.3 on 2026-10-19 17:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('AssignEaseApp', '0005_submission_archive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SubmissionRevision',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('number', models.PositiveIntegerField()),
+                ('is_snapshot', models.BooleanField(default=False)),
+                ('data', models.BinaryField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('submission', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='revisions', to='AssignEaseApp.submission')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('submission', 'number'), name='unique_submission_revision')],
+            },
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.1.3 on 2026-10-19 17:13
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_rows(model, fk, status=None):
+    rows = model.objects.filter(**{fk: OuterRef('pk')})
+    if status:
+        rows = rows.filter(status=status)
+    return Coalesce(Subquery(rows.values(fk).annotate(total=Count('pk')).values('total')), 0)
+
+
+def backfill_counters(apps, schema_editor):
+    Class = apps.get_model('AssignEaseApp', 'Class')
+    ClassStudent = apps.get_model('AssignEaseApp', 'ClassStudent')
+    Assignment = apps.get_model('AssignEaseApp', 'Assignment')
+    Submission = apps.get_model('AssignEaseApp', 'Submission')
+    ArchivedSubmission = apps.get_model('AssignEaseApp', 'ArchivedSubmission')
+
+    Class.objects.update(student_count=count_rows(ClassStudent, 'class_assigned'))
+    for status in ('submitted', 'checked', 'reassigned', 'rejected'):
+        Assignment.objects.update(**{
+            f'{status}_count': (
+                count_rows(Submission, 'assignment', status)
+                + count_rows(ArchivedSubmission, 'assignment', status)
+            ),
+        })
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('AssignEaseApp', '0006_submissionrevision'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='assignment',
+            name='checked_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='assignment',
+            name='reassigned_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='assignment',
+            name='rejected_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='assignment',
+            name='submitted_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='class',
+            name='student_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.1.3 on 2026-10-19 17:17
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('AssignEaseApp', '0007_denormalized_counters'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PendingAssignment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('due_date', models.DateField()),
+                ('assignment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pending', to='AssignEaseApp.assignment')),
+                ('class_assigned', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='AssignEaseApp.class')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pending_assignments', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['student', 'due_date', 'assignment'], name='pending_by_due_date')],
+                'constraints': [models.UniqueConstraint(fields=('student', 'assignment'), name='unique_pending_assignment')],
+            },
+        ),
+    ]
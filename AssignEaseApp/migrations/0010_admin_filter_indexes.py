@@ -0,0 +1,28 @@
+# Generated by Django 5.1.3 on 2026-10-19 17:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('AssignEaseApp', '0009_submissionfile'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='assignment',
+            name='due_date',
+            field=models.DateField(db_index=True),
+        ),
+        migrations.AlterField(
+            model_name='profile',
+            name='role',
+            field=models.CharField(choices=[('teacher', 'Teacher'), ('student', 'Student')], db_index=True, max_length=10),
+        ),
+        migrations.AlterField(
+            model_name='submission',
+            name='status',
+            field=models.CharField(choices=[('submitted', 'Submitted'), ('checked', 'Checked'), ('reassigned', 'Reassigned'), ('rejected', 'Rejected')], db_index=True, max_length=50),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.1.3 on 2026-10-19 17:24
+
+import django.db.models.manager
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('AssignEaseApp', '0010_admin_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='assignment',
+            options={'base_manager_name': 'objects'},
+        ),
+        migrations.AlterModelOptions(
+            name='assignmentquestion',
+            options={'base_manager_name': 'objects'},
+        ),
+        migrations.AlterModelOptions(
+            name='class',
+            options={'base_manager_name': 'all_objects'},
+        ),
+        migrations.AlterModelOptions(
+            name='profile',
+            options={'base_manager_name': 'objects'},
+        ),
+        migrations.AlterModelOptions(
+            name='programminglanguage',
+            options={'base_manager_name': 'objects'},
+        ),
+        migrations.AlterModelOptions(
+            name='submission',
+            options={'base_manager_name': 'objects'},
+        ),
+        migrations.AlterModelManagers(
+            name='class',
+            managers=[
+                ('objects', django.db.models.manager.Manager()),
+                ('all_objects', django.db.models.manager.Manager()),
+            ],
+        ),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 5.1.3 on 2026-10-19 17:32
+
+from datetime import timezone
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncHour
+
+
+def backfill_activity(apps, schema_editor):
+    Class = apps.get_model('AssignEaseApp', 'Class')
+    Submission = apps.get_model('AssignEaseApp', 'Submission')
+    ArchivedSubmission = apps.get_model('AssignEaseApp', 'ArchivedSubmission')
+    SubmissionActivity = apps.get_model('AssignEaseApp', 'SubmissionActivity')
+
+    for class_id in list(Class.objects.filter(deleted_at__isnull=True).values_list('pk', flat=True)):
+        buckets = {}
+        for model in (Submission, ArchivedSubmission):
+            for row in (
+                model.objects.filter(assignment__class_assigned_id=class_id)
+                .annotate(hour=TruncHour('submitted_at', tzinfo=timezone.utc))
+                .values('assignment_id', 'status', 'hour')
+                .annotate(total=Count('pk'))
+                .order_by()
+            ):
+                for granularity, bucket in (('hour', row['hour']), ('day', row['hour'].replace(hour=0))):
+                    key = (row['assignment_id'], row['status'], granularity, bucket)
+                    buckets[key] = buckets.get(key, 0) + row['total']
+        SubmissionActivity.objects.bulk_create(
+            [
+                SubmissionActivity(
+                    class_assigned_id=class_id, assignment_id=assignment_id, status=status,
+                    granularity=granularity, bucket=bucket, count=total,
+                )
+                for (assignment_id, status, granularity, bucket), total in buckets.items()
+            ],
+            batch_size=1000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('AssignEaseApp', '0013_revokedtoken'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SubmissionActivity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('submitted', 'Submitted'), ('checked', 'Checked'), ('reassigned', 'Reassigned'), ('rejected', 'Rejected')], max_length=50)),
+                ('granularity', models.CharField(choices=[('hour', 'Hour'), ('day', 'Day')], max_length=4)),
+                ('bucket', models.DateTimeField()),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('assignment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='activity', to='AssignEaseApp.assignment')),
+                ('class_assigned', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='AssignEaseApp.class')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['assignment', 'granularity', 'bucket'], name='activity_by_assignment')],
+                'constraints': [models.UniqueConstraint(fields=('class_assigned', 'granularity', 'bucket', 'assignment', 'status'), name='unique_submission_activity')],
+            },
+        ),
+        migrations.RunPython(backfill_activity, migrations.RunPython.noop),
+    ]
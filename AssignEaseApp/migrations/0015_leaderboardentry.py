@@ -0,0 +1,65 @@
+# Generated by Django 5.1.3 on 2026-10-19 17:34
+
+from datetime import timezone
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_leaderboard(apps, schema_editor):
+    Class = apps.get_model('AssignEaseApp', 'Class')
+    ClassStudent = apps.get_model('AssignEaseApp', 'ClassStudent')
+    Submission = apps.get_model('AssignEaseApp', 'Submission')
+    ArchivedSubmission = apps.get_model('AssignEaseApp', 'ArchivedSubmission')
+    LeaderboardEntry = apps.get_model('AssignEaseApp', 'LeaderboardEntry')
+
+    for class_id in list(Class.objects.filter(deleted_at__isnull=True).values_list('pk', flat=True)):
+        counts = {}
+        for model in (Submission, ArchivedSubmission):
+            for student_id, status, submitted_at, due_date in model.objects.filter(
+                assignment__class_assigned_id=class_id,
+            ).values_list('student_id', 'status', 'submitted_at', 'assignment__due_date').iterator(chunk_size=1000):
+                count = counts.setdefault(student_id, [0, 0, 0])
+                count[0] += status == 'checked'
+                count[1] += submitted_at is not None and submitted_at.astimezone(timezone.utc).date() <= due_date
+                count[2] += 1
+        entries = []
+        for student_id in ClassStudent.objects.filter(class_assigned_id=class_id).values_list('student_id', flat=True):
+            checked, on_time, total = counts.get(student_id, (0, 0, 0))
+            # leaderboard.score at the time of this migration.
+            rate = on_time * 1000 // total if total else 0
+            entries.append(LeaderboardEntry(
+                class_assigned_id=class_id, student_id=student_id, checked_count=checked,
+                on_time_count=on_time, submission_count=total, score=checked * 1001 + rate,
+            ))
+        LeaderboardEntry.objects.bulk_create(entries, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('AssignEaseApp', '0014_submissionactivity'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('checked_count', models.PositiveIntegerField(default=0)),
+                ('on_time_count', models.PositiveIntegerField(default=0)),
+                ('submission_count', models.PositiveIntegerField(default=0)),
+                ('score', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('class_assigned', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='AssignEaseApp.class')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['class_assigned', 'score', 'student'], name='leaderboard_rank')],
+                'constraints': [models.UniqueConstraint(fields=('class_assigned', 'student'), name='unique_leaderboard_entry')],
+            },
+        ),
+        migrations.RunPython(backfill_leaderboard, migrations.RunPython.noop),
+    ]
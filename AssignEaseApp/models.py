@@ -1,7 +1,11 @@
+import uuid
+
 from django.db import models
 from django.contrib.auth.models import User
 from django.db.models import UniqueConstraint
 
+from .identity import IdentityMapManager, IdentityMapQuerySet
+
 class Profile(models.Model):
     USER_ROLES = [
         ('teacher', 'Teacher'),
@@ -9,19 +13,48 @@ class Profile(models.Model):
     ]
 
     user = models.OneToOneField(User, on_delete=models.CASCADE)
-    role = models.CharField(max_length=10, choices=USER_ROLES)
+    role = models.CharField(max_length=10, choices=USER_ROLES, db_index=True)
     name = models.CharField(max_length=255, null=True, blank=True)
     enrollment_number = models.CharField(max_length=50, null=True, blank=True)
     tid = models.CharField(max_length=50, null=True, blank=True)
 
+    objects = IdentityMapManager()
+
+    class Meta:
+        base_manager_name = 'objects'
+
     def __str__(self):
         return f"{self.user.username} ({self.role})"    
 
+class ActiveClassQuerySet(IdentityMapQuerySet):
+    def accepts(self, instance):
+        return instance.deleted_at is None
+
+
+class ActiveClassManager(IdentityMapManager.from_queryset(ActiveClassQuerySet)):
+    def get_queryset(self):
+        queryset = super().get_queryset().filter(deleted_at__isnull=True)
+        queryset._identity_lookup = True
+        return queryset
+
+
 class Class(models.Model):
     class_name = models.CharField(max_length=100)
     teacher = models.ForeignKey(User, on_delete=models.CASCADE)  # Assuming the user is a teacher
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Set when a teacher deletes the class; the rows are purged later in batches.
+    deleted_at = models.DateTimeField(null=True, blank=True, db_index=True)
+    # Set when a teacher closes the class early; its submissions become eligible for archiving.
+    closed_at = models.DateTimeField(null=True, blank=True)
+    # Maintained by AssignEaseApp.counters; repaired by `manage.py reconcile_counters`.
+    student_count = models.PositiveIntegerField(default=0)
+
+    objects = ActiveClassManager()
+    all_objects = IdentityMapManager()
+
+    class Meta:
+        base_manager_name = 'all_objects'
 
     def __str__(self):
         return self.class_name
@@ -31,6 +64,13 @@ class ClassStudent(models.Model):
     student = models.ForeignKey(User, on_delete=models.CASCADE)
     class_assigned = models.ForeignKey(Class, on_delete=models.CASCADE)
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # The class the counters were last updated for (see counters.py).
+        instance._counted = instance.__dict__.get('class_assigned_id')
+        return instance
+
     class Meta:
         constraints = [
             UniqueConstraint(fields=['student', 'class_assigned'], name='unique_student_class')
@@ -42,6 +82,11 @@ class ClassStudent(models.Model):
 class ProgrammingLanguage(models.Model):
     language_name = models.CharField(max_length=50)
 
+    objects = IdentityMapManager()
+
+    class Meta:
+        base_manager_name = 'objects'
+
     def __str__(self):
         return self.language_name
 
@@ -50,11 +95,21 @@ class Assignment(models.Model):
     class_assigned = models.ForeignKey(Class, on_delete=models.CASCADE)
     title = models.CharField(max_length=255)
     description = models.TextField()
-    due_date = models.DateField()
+    due_date = models.DateField(db_index=True)
     teacher = models.ForeignKey(User, on_delete=models.CASCADE)
     language = models.ForeignKey(ProgrammingLanguage, on_delete=models.CASCADE) 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Submissions per status, maintained by AssignEaseApp.counters.
+    submitted_count = models.PositiveIntegerField(default=0)
+    checked_count = models.PositiveIntegerField(default=0)
+    reassigned_count = models.PositiveIntegerField(default=0)
+    rejected_count = models.PositiveIntegerField(default=0)
+
+    objects = IdentityMapManager()
+
+    class Meta:
+        base_manager_name = 'objects'
     
     def __str__(self):
         return self.title 
@@ -69,6 +124,11 @@ class AssignmentQuestion(models.Model):
     question_text = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = IdentityMapManager()
+
+    class Meta:
+        base_manager_name = 'objects'
+
     def __str__(self):
         return f"Question {self.id} for {self.assignment.title}"
 
@@ -85,19 +145,221 @@ class Submission(models.Model):
     assignment = models.ForeignKey(Assignment, on_delete=models.CASCADE, related_name='submissions')
     question = models.ForeignKey(AssignmentQuestion, on_delete=models.CASCADE)
     code = models.TextField()
-    status = models.CharField(max_length=50, choices=STATUS_CHOICES)
+    status = models.CharField(max_length=50, choices=STATUS_CHOICES, db_index=True)
     feedback = models.TextField(blank=True, null=True)
     submitted_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # The grader reviewing this submission and when that lease runs out (see review.py).
+    claimed_by = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True, related_name='claimed_submissions',
+    )
+    claim_expires_at = models.DateTimeField(null=True, blank=True)
+
+    objects = IdentityMapManager()
 
     class Meta:
         unique_together = ('student', 'assignment', 'question') 
+        base_manager_name = 'objects'
+        indexes = [
+            models.Index(fields=['assignment', 'status', 'claim_expires_at'], name='review_queue'),
+        ]
+
+    def __str__(self):
+        # Deliberately avoids the foreign keys so listing submissions stays one query.
+        return f"Submission {self.id}"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # The (assignment, status) the counters were last updated for (see counters.py).
+        instance._counted = (instance.__dict__.get('assignment_id'), instance.__dict__.get('status'))
+        # The code the revision history last saw (see signals.track_submission_revision).
+        if 'code' in instance.__dict__:
+            instance._recorded_code = instance.code
+        return instance
+
+
 
 
 
 
 
 
+def submission_file_path(instance, filename):
+    return f"submissions/{instance.submission_id}/{uuid.uuid4().hex}/{filename}"
+
+
+class SubmissionFile(models.Model):
+    """A file uploaded for a submission, stored on disk rather than in the database."""
+    # No database constraint, like SubmissionRevision: files stay with archived submissions.
+    submission = models.ForeignKey(Submission, on_delete=models.DO_NOTHING, db_constraint=False, related_name='files')
+    file = models.FileField(upload_to=submission_file_path, max_length=500)
+    name = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField()
+    uploaded_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.name} (submission {self.submission_id})"
+
+
+class PendingAssignment(models.Model):
+    """
+    An assignment a student still has to submit: one row per (student,
+    assignment), kept up to date by AssignEaseApp.todo.
+    """
+    student = models.ForeignKey(User, on_delete=models.CASCADE, related_name='pending_assignments')
+    assignment = models.ForeignKey(Assignment, on_delete=models.CASCADE, related_name='pending')
+    class_assigned = models.ForeignKey(Class, on_delete=models.CASCADE)
+    due_date = models.DateField()
+
+    class Meta:
+        constraints = [
+            UniqueConstraint(fields=['student', 'assignment'], name='unique_pending_assignment')
+        ]
+        indexes = [
+            models.Index(fields=['student', 'due_date', 'assignment'], name='pending_by_due_date'),
+        ]
+
+    def __str__(self):
+        return f"Assignment {self.assignment_id} pending for student {self.student_id}"
+
+
+class SubmissionActivity(models.Model):
+    """
+    How many submissions of one assignment, in one status, were first
+    submitted in one hour or day (UTC). Maintained by AssignEaseApp.rollups.
+    """
+    GRANULARITIES = [
+        ('hour', 'Hour'),
+        ('day', 'Day'),
+    ]
+    class_assigned = models.ForeignKey(Class, on_delete=models.CASCADE)
+    assignment = models.ForeignKey(Assignment, on_delete=models.CASCADE, related_name='activity')
+    status = models.CharField(max_length=50, choices=Submission.STATUS_CHOICES)
+    granularity = models.CharField(max_length=4, choices=GRANULARITIES)
+    bucket = models.DateTimeField()
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            UniqueConstraint(
+                fields=['class_assigned', 'granularity', 'bucket', 'assignment', 'status'],
+                name='unique_submission_activity',
+            )
+        ]
+        indexes = [
+            models.Index(fields=['assignment', 'granularity', 'bucket'], name='activity_by_assignment'),
+        ]
+
+    def __str__(self):
+        return f"{self.count} {self.status} for assignment {self.assignment_id} ({self.granularity} of {self.bucket})"
+
+
+class LeaderboardEntry(models.Model):
+    """
+    One student's standing in one class, maintained by AssignEaseApp.leaderboard.
+    ``score`` ranks by checked submissions, then by on-time rate.
+    """
+    class_assigned = models.ForeignKey(Class, on_delete=models.CASCADE)
+    student = models.ForeignKey(User, on_delete=models.CASCADE, related_name='leaderboard_entries')
+    checked_count = models.PositiveIntegerField(default=0)
+    # Submissions first submitted no later than the end of the assignment's due date (UTC).
+    on_time_count = models.PositiveIntegerField(default=0)
+    submission_count = models.PositiveIntegerField(default=0)
+    score = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            UniqueConstraint(fields=['class_assigned', 'student'], name='unique_leaderboard_entry')
+        ]
+        indexes = [
+            models.Index(fields=['class_assigned', 'score', 'student'], name='leaderboard_rank'),
+        ]
+
+    def __str__(self):
+        return f"Student {self.student_id} in class {self.class_assigned_id}: {self.score}"
+
+
+class SubmissionRevision(models.Model):
+    """
+    One version of ``Submission.code``, stored as a compressed line delta
+    against the previous revision or, every few revisions, as a full snapshot.
+    """
+    # No database constraint: the history outlives the hot row when a submission is archived.
+    submission = models.ForeignKey(Submission, on_delete=models.DO_NOTHING, db_constraint=False, related_name='revisions')
+    number = models.PositiveIntegerField()
+    is_snapshot = models.BooleanField(default=False)
+    data = models.BinaryField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            UniqueConstraint(fields=['submission', 'number'], name='unique_submission_revision')
+        ]
+
+    def __str__(self):
+        return f"Revision {self.number} of submission {self.submission_id}"
+
+
+class ArchivedSubmission(models.Model):
+    """
+    A submission moved out of the hot table by ``manage.py archive_closed_classes``.
+
+    Keeps the original submission id and the columns needed for lookups;
+    code, feedback and the teacher feedback rows live compressed in ``data``.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    student = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_submissions')
+    assignment = models.ForeignKey(Assignment, on_delete=models.CASCADE, related_name='archived_submissions')
+    question = models.ForeignKey(AssignmentQuestion, on_delete=models.CASCADE)
+    status = models.CharField(max_length=50, choices=Submission.STATUS_CHOICES)
+    submitted_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+    data = models.BinaryField()
+
+    def __str__(self):
+        return f"Archived submission {self.id}"
+
+
+class RevokedToken(models.Model):
+    """
+    A JWT that may no longer be used, identified by its ``jti`` claim.
+
+    Workers mirror this table in a Bloom filter (see revocation.py) and read
+    the autoincrement ``id`` to pick up new rows incrementally.
+    """
+    jti = models.CharField(max_length=255, unique=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, related_name='revoked_tokens')
+    token_type = models.CharField(max_length=20)
+    # Once the token has expired it can no longer validate, so the row can be pruned.
+    expires_at = models.DateTimeField(db_index=True)
+    revoked_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Revoked {self.token_type} token {self.jti}"
+
+
+class CohortImport(models.Model):
+    """
+    A cohort upload imported in the background (see cohort.py), and once
+    finished its report. The report holds generated passwords, so rows are
+    deleted after ``expires_at``.
+    """
+    STATUSES = [
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='cohort_imports')
+    status = models.CharField(max_length=10, choices=STATUSES, default='running')
+    report = models.JSONField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"Cohort import {self.pk.hex} ({self.status})"
 
 
 class TeacherFeedback(models.Model):
@@ -0,0 +1,11 @@
+"""Compact storage for JSON payloads kept in binary columns (archive and revision history)."""
+import json
+import zlib
+
+
+def pack(payload):
+    return zlib.compress(json.dumps(payload, separators=(',', ':')).encode(), 9)
+
+
+def unpack(data):
+    return json.loads(zlib.decompress(bytes(data)))
@@ -0,0 +1,79 @@
+"""
+Read-only row projections for the large list endpoints.
+
+Each function returns exactly what the matching serializer would produce,
+but builds the rows from a single ``values_list()`` query instead of
+instantiating a model and a serializer per row.
+"""
+from rest_framework import serializers
+
+from . import refcache
+
+_datetime = serializers.DateTimeField()
+
+SUBMISSION_COLUMNS = (
+    'id',
+    'assignment__title',
+    'assignment__class_assigned_id',
+    'assignment_id',
+    'student_id',
+    'question_id',
+    'question__question_text',
+    'code',
+    'status',
+    'feedback',
+    'submitted_at',
+    'updated_at',
+)
+
+CLASS_STUDENT_COLUMNS = (
+    'id',
+    'student_id',
+    'class_assigned_id',
+    'student__profile__name',
+    'student__profile__enrollment_number',
+)
+
+
+def submission_rows(queryset):
+    """Rows matching ``SubmissionSerializer(queryset, many=True).data``."""
+    datetime = _datetime.to_representation
+    rows = list(queryset.values_list(*SUBMISSION_COLUMNS))
+    # Class names come from the reference cache rather than another join.
+    class_names = refcache.class_names.get_many({row[2] for row in rows})
+    return [
+        {
+            'id': pk,
+            'title': title,
+            'subject': class_names.get(class_id),
+            'assignment': assignment,
+            'student': student,
+            'question': question,
+            'questiontext': questiontext,
+            'code': code,
+            'status': status,
+            'feedback': feedback,
+            'submitted_at': datetime(submitted_at),
+            'updated_at': datetime(updated_at),
+        }
+        for (pk, title, class_id, assignment, student, question, questiontext,
+             code, status, feedback, submitted_at, updated_at)
+        in rows
+    ]
+
+
+def class_student_rows(queryset):
+    """Rows matching ``ClassStudentSerializer(queryset, many=True).data``."""
+    rows = list(queryset.values_list(*CLASS_STUDENT_COLUMNS))
+    class_names = refcache.class_names.get_many({row[2] for row in rows})
+    return [
+        {
+            'id': pk,
+            'student': student,
+            'class_name': class_names.get(class_id),
+            'student_name': student_name,
+            'enrollment_number': enrollment_number,
+        }
+        for pk, student, class_id, student_name, enrollment_number
+        in rows
+    ]
@@ -0,0 +1,89 @@
+"""
+In-process cache of small, hot reference data.
+
+Programming language names and class names are read for nearly every
+assignment, enrolment and submission that gets serialized, but change
+rarely. Each worker keeps them in a bounded LRU cache whose entries also
+expire after ``REFERENCE_CACHE_TTL_SECONDS``. The receivers in
+``signals.py`` drop an entry when its row is saved or deleted in this
+worker; the TTL bounds how long other workers can serve a stale name.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+from .models import Class, ProgrammingLanguage
+
+
+class ReferenceCache:
+    """A thread-safe LRU cache of ``pk -> value`` filled by ``loader(pks)``."""
+
+    def __init__(self, loader, maxsize, ttl):
+        self.loader = loader
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        # Bumped by invalidate() so a load that raced with it is not stored.
+        self._generation = 0
+
+    def get_many(self, keys):
+        now = time.monotonic()
+        found, missing = {}, []
+        with self._lock:
+            generation = self._generation
+            for key in set(keys):
+                entry = self._data.get(key)
+                if entry is not None and entry[1] > now:
+                    self._data.move_to_end(key)
+                    found[key] = entry[0]
+                else:
+                    missing.append(key)
+        if missing:
+            loaded = self.loader(missing)
+            with self._lock:
+                if generation == self._generation:
+                    for key, value in loaded.items():
+                        self._data[key] = (value, now + self.ttl)
+                        self._data.move_to_end(key)
+                    while len(self._data) > self.maxsize:
+                        self._data.popitem(last=False)
+            found.update(loaded)
+        return found
+
+    def get(self, key):
+        if key is None:
+            return None
+        return self.get_many([key]).get(key)
+
+    def invalidate(self, key=None):
+        with self._lock:
+            self._generation += 1
+            if key is None:
+                self._data.clear()
+            else:
+                self._data.pop(key, None)
+
+
+languages = ReferenceCache(
+    lambda pks: dict(ProgrammingLanguage.objects.filter(pk__in=pks).values_list('pk', 'language_name')),
+    settings.REFERENCE_CACHE_MAX_ENTRIES,
+    settings.REFERENCE_CACHE_TTL_SECONDS,
+)
+
+# Soft-deleted classes keep their names, so read through all_objects.
+class_names = ReferenceCache(
+    lambda pks: dict(Class.all_objects.filter(pk__in=pks).values_list('pk', 'class_name')),
+    settings.REFERENCE_CACHE_MAX_ENTRIES,
+    settings.REFERENCE_CACHE_TTL_SECONDS,
+)
+
+
+def language_name(language_id):
+    return languages.get(language_id)
+
+
+def class_name(class_id):
+    return class_names.get(class_id)
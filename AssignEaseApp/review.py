@@ -0,0 +1,68 @@
+"""
+Review queue for graders working on the same assignments.
+
+``claim`` hands a grader the next unreviewed ('submitted') submissions of
+some assignments and leases them to that grader until ``claim_expires_at``.
+Rows are picked with ``SELECT ... FOR UPDATE SKIP LOCKED``, so graders
+claiming at the same time skip each other's rows instead of waiting on
+them or taking the same ones. A lease that runs out puts the submission
+back in the queue. Grading it clears the claim.
+
+The ``review_queue`` index on (assignment, status, claim_expires_at) keeps
+a claim a short index range scan: never-claimed rows (NULL) come first,
+then expired leases, oldest first.
+"""
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Submission
+
+
+def queue(assignment_ids, now=None):
+    """Submissions of ``assignment_ids`` that are waiting for a grader."""
+    now = now or timezone.now()
+    return Submission.objects.filter(
+        Q(claim_expires_at__isnull=True) | Q(claim_expires_at__lte=now),
+        assignment_id__in=assignment_ids,
+        status='submitted',
+    )
+
+
+def claim(user, assignment_ids, limit, lease_seconds):
+    """
+    Lease up to ``limit`` queued submissions of ``assignment_ids`` to
+    ``user``; return their ids and the lease end. The caller checks that
+    ``user`` may grade those assignments.
+    """
+    now = timezone.now()
+    expires_at = now + timedelta(seconds=lease_seconds)
+    with transaction.atomic():
+        ids = list(
+            # No joins here: FOR UPDATE would lock the joined assignment and
+            # class rows too, and concurrent graders would skip everything.
+            queue(assignment_ids, now)
+            .select_for_update(skip_locked=True)
+            # NULLs sort first on MySQL and SQLite but last on PostgreSQL; say so explicitly.
+            .order_by(F('claim_expires_at').asc(nulls_first=True), 'pk')
+            .values_list('pk', flat=True)[:limit]
+        )
+        if ids:
+            Submission.objects.filter(pk__in=ids).update(claimed_by=user, claim_expires_at=expires_at)
+    return ids, expires_at
+
+
+def release(user, submission_ids=None):
+    """Put ``user``'s claimed submissions (all of them by default) back in the queue."""
+    claimed = Submission.objects.filter(claimed_by=user, claim_expires_at__gt=timezone.now())
+    if submission_ids is not None:
+        claimed = claimed.filter(pk__in=submission_ids)
+    return claimed.update(claimed_by=None, claim_expires_at=None)
+
+
+def clear_claim(submission):
+    """Drop the claim of a submission that is being graded; the caller saves it."""
+    submission.claimed_by = None
+    submission.claim_expires_at = None
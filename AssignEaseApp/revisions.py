@@ -0,0 +1,101 @@
+"""
+Delta-compressed history of ``Submission.code``.
+
+Every change of a submission's code appends a ``SubmissionRevision``. Most
+revisions hold a line delta against the previous version: a list whose items
+are either ``[start, end]`` (copy those lines of the previous version) or a
+string (insert it). Every ``SNAPSHOT_INTERVAL`` revisions a full copy is
+stored instead, so rebuilding any version reads at most that many rows.
+"""
+import difflib
+
+from django.db import IntegrityError, transaction
+
+from .models import SubmissionRevision
+from .packing import pack, unpack
+
+SNAPSHOT_INTERVAL = 10
+
+
+def make_delta(old, new):
+    old_lines = old.splitlines(keepends=True)
+    new_lines = new.splitlines(keepends=True)
+    delta = []
+    matcher = difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            delta.append([i1, i2])
+        elif j2 > j1:
+            delta.append(''.join(new_lines[j1:j2]))
+    return delta
+
+
+def apply_delta(old, delta):
+    old_lines = old.splitlines(keepends=True)
+    return ''.join(
+        ''.join(old_lines[item[0]:item[1]]) if isinstance(item, list) else item
+        for item in delta
+    )
+
+
+def revision_code(submission_id, number):
+    """Rebuild the code of one revision, or return None if it does not exist."""
+    revisions = SubmissionRevision.objects.filter(submission_id=submission_id, number__lte=number)
+    snapshot = revisions.filter(is_snapshot=True).order_by('-number').first()
+    if snapshot is None:
+        return None
+
+    code = unpack(snapshot.data)
+    last = snapshot.number
+    for revision in revisions.filter(number__gt=snapshot.number).order_by('number'):
+        code = apply_delta(code, unpack(revision.data))
+        last = revision.number
+    return code if last == number else None
+
+
+def record_revision(submission_id, code):
+    """
+    Append ``code`` to the history of a submission unless it is unchanged.
+
+    Meant to run after the submission itself has been committed, so it never
+    holds the hot row's lock.
+    """
+    for _ in range(3):
+        try:
+            with transaction.atomic():
+                latest = (
+                    SubmissionRevision.objects.select_for_update()
+                    .filter(submission_id=submission_id)
+                    .order_by('-number')
+                    .values_list('number', flat=True)
+                    .first()
+                )
+                if latest is None:
+                    number, previous = 1, None
+                else:
+                    number, previous = latest + 1, revision_code(submission_id, latest)
+                    if previous == code:
+                        return None
+
+                is_snapshot = previous is None or number % SNAPSHOT_INTERVAL == 1
+                return SubmissionRevision.objects.create(
+                    submission_id=submission_id,
+                    number=number,
+                    is_snapshot=is_snapshot,
+                    data=pack(code if is_snapshot else make_delta(previous, code)),
+                )
+        except IntegrityError:
+            # Another writer took this revision number first; re-read and retry.
+            continue
+    return None
+
+
+def record_first_revisions(items):
+    """Store the first revision of newly created submissions, ``(submission_id, code)`` pairs, in one insert."""
+    SubmissionRevision.objects.bulk_create(
+        [
+            SubmissionRevision(submission_id=submission_id, number=1, is_snapshot=True, data=pack(code))
+            for submission_id, code in items
+        ],
+        ignore_conflicts=True,
+    )
@@ -0,0 +1,161 @@
+"""
+Revoked JWT checks that cost no query for tokens that were never revoked.
+
+Each worker keeps a Bloom filter of the ``jti`` claims in ``RevokedToken``.
+A token whose jti is not in the filter is certainly not revoked. Only a hit,
+whether a revoked token or the rare false positive, is confirmed against
+the database.
+
+The filter catches up with rows written by other workers every
+``REVOKED_TOKEN_REFRESH_SECONDS``, reading only rows past the last id it
+has seen. Revocations made by this worker are added to it at once.
+"""
+import hashlib
+import math
+import threading
+import time
+from datetime import datetime, timezone
+
+from django.conf import settings
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import RevokedToken
+
+# Rows are re-read this far behind the last id seen, so rows whose ids were
+# allocated earlier but committed later are not missed.
+ID_OVERLAP = 1000
+BATCH_SIZE = 5000
+
+
+class BloomFilter:
+    def __init__(self, capacity, error_rate):
+        self.capacity = capacity
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+        return ((first + i * second) % self.size for i in range(self.hashes))
+
+    def add(self, key, new=True):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        if new:
+            self.count += 1
+
+    def __contains__(self, key):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class RevocationFilter:
+    """The per-worker Bloom filter mirror of ``RevokedToken``."""
+
+    def __init__(self, capacity, error_rate, refresh_seconds):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.Lock()
+        self._bloom = None
+        self._last_id = 0
+        self._refreshed_at = 0.0
+
+    def _load(self, bloom, after_id, counted_id):
+        # Rows at or below ``counted_id`` are already in ``bloom.count``; the
+        # overlap window is re-read only to catch late-committed inserts.
+        last_id = after_id
+        while True:
+            rows = list(
+                RevokedToken.objects.filter(pk__gt=last_id).order_by('pk').values_list('pk', 'jti')[:BATCH_SIZE]
+            )
+            for pk, jti in rows:
+                bloom.add(jti, new=pk > counted_id)
+            if rows:
+                last_id = rows[-1][0]
+            if len(rows) < BATCH_SIZE:
+                return last_id
+
+    def _saturated(self):
+        # First use, or the filter is so full its false-positive rate has grown.
+        return self._bloom is None or self._bloom.count > self._bloom.capacity
+
+    def _rebuild(self):
+        capacity = max(self.capacity, RevokedToken.objects.count() * 2)
+        bloom = BloomFilter(capacity, self.error_rate)
+        self._last_id = self._load(bloom, 0, 0)
+        self._bloom = bloom
+        self._refreshed_at = time.monotonic()
+
+    def rebuild(self):
+        with self._lock:
+            self._rebuild()
+
+    def refresh(self):
+        if not self._saturated() and time.monotonic() - self._refreshed_at < self.refresh_seconds:
+            return
+        with self._lock:
+            # Another thread may have rebuilt or caught up while this one waited.
+            if self._saturated():
+                self._rebuild()
+            elif time.monotonic() - self._refreshed_at >= self.refresh_seconds:
+                last_id = self._load(self._bloom, max(0, self._last_id - ID_OVERLAP), self._last_id)
+                self._last_id = max(self._last_id, last_id)
+                self._refreshed_at = time.monotonic()
+
+    def add(self, jti):
+        # Counted when the next refresh reads its row back.
+        with self._lock:
+            if self._bloom is not None:
+                self._bloom.add(jti, new=False)
+
+    def is_revoked(self, jti):
+        if not jti:
+            return False
+        self.refresh()
+        if jti not in self._bloom:
+            return False
+        return RevokedToken.objects.filter(jti=jti).exists()
+
+
+revoked = RevocationFilter(
+    settings.REVOKED_TOKEN_FILTER_CAPACITY,
+    settings.REVOKED_TOKEN_FILTER_ERROR_RATE,
+    settings.REVOKED_TOKEN_REFRESH_SECONDS,
+)
+
+
+def is_revoked(token):
+    return revoked.is_revoked(token.get(api_settings.JTI_CLAIM))
+
+
+def revoke(token):
+    """Revoke a validated access or refresh token until it expires."""
+    jti = token[api_settings.JTI_CLAIM]
+    RevokedToken.objects.bulk_create(
+        [
+            RevokedToken(
+                jti=jti,
+                user_id=token.get(api_settings.USER_ID_CLAIM),
+                token_type=token.get(api_settings.TOKEN_TYPE_CLAIM) or '',
+                expires_at=datetime.fromtimestamp(token['exp'], tz=timezone.utc),
+            )
+        ],
+        ignore_conflicts=True,
+    )
+    revoked.add(jti)
+
+
+def prune(batch_size=1000):
+    """Delete rows of tokens that have expired anyway; returns how many went."""
+    now = datetime.now(tz=timezone.utc)
+    deleted = 0
+    while True:
+        ids = list(RevokedToken.objects.filter(expires_at__lt=now).values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            break
+        deleted += RevokedToken.objects.filter(pk__in=ids)._raw_delete(RevokedToken.objects.db)
+    if deleted:
+        revoked.rebuild()
+    return deleted
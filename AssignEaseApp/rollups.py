@@ -0,0 +1,161 @@
+"""
+Hourly and daily submission activity, pre-aggregated.
+
+``SubmissionActivity`` holds, per class, assignment, status and UTC hour or
+day, how many submissions were first submitted in that bucket and are now
+in that status: the result of grouping ``Submission`` and
+``ArchivedSubmission`` by truncated ``submitted_at``, kept up to date so
+that charts never scan the submissions themselves.
+
+Single-row saves and deletes are handled by the receivers in
+``signals.py``; bulk write paths call ``record`` directly. Archiving keeps
+the rows. ``rebuild_class`` recomputes one class from scratch, and
+``manage.py backfill_submission_activity`` runs it class by class.
+"""
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncHour
+
+from .derived import rebuild_classes
+from .models import Submission, ArchivedSubmission, SubmissionActivity
+
+GRANULARITIES = {'hour': timedelta(hours=1), 'day': timedelta(days=1)}
+BATCH_SIZE = 1000
+
+
+def bucket_start(moment, granularity):
+    moment = moment.astimezone(dt_timezone.utc).replace(minute=0, second=0, microsecond=0)
+    return moment.replace(hour=0) if granularity == 'day' else moment
+
+
+def _bump(class_id, assignment_id, status, granularity, bucket, delta):
+    rows = SubmissionActivity.objects.filter(
+        class_assigned_id=class_id, granularity=granularity, bucket=bucket, assignment_id=assignment_id, status=status,
+    )
+    if delta < 0:
+        # Never drive a count below zero; a rebuild repairs the drift instead.
+        rows.filter(count__gte=-delta).update(count=F('count') + delta)
+        return
+    if rows.update(count=F('count') + delta):
+        return
+    try:
+        with transaction.atomic():
+            SubmissionActivity.objects.create(
+                class_assigned_id=class_id, assignment_id=assignment_id, status=status,
+                granularity=granularity, bucket=bucket, count=delta,
+            )
+    except IntegrityError:
+        # Another writer created the row first.
+        rows.update(count=F('count') + delta)
+
+
+def record(changes):
+    """Apply ``(class_id, assignment_id, status, submitted_at, delta)`` changes to both granularities."""
+    totals = {}
+    for class_id, assignment_id, status, submitted_at, delta in changes:
+        if not class_id or not status or submitted_at is None or not delta:
+            continue
+        for granularity in GRANULARITIES:
+            key = (class_id, assignment_id, status, granularity, bucket_start(submitted_at, granularity))
+            totals[key] = totals.get(key, 0) + delta
+    # A fixed order keeps concurrent writers from deadlocking on each other's rows.
+    for key in sorted(totals):
+        if totals[key]:
+            _bump(*key, totals[key])
+
+
+def submission_moved(submitted_at, old, new, assignments):
+    """
+    Move one submission between ``(assignment_id, status)`` buckets, like ``counters.submission_moved``.
+
+    ``assignments`` maps the assignment ids involved to ``(class_id, due_date)``.
+    """
+    if old == new:
+        return
+    changes = []
+    for key, sign in ((old, -1), (new, 1)):
+        if key is not None and key[0] in assignments:
+            changes.append((assignments[key[0]][0], key[0], key[1], submitted_at, sign))
+    record(changes)
+
+
+def rebuild_class(class_id, batch_size=BATCH_SIZE):
+    """Recompute every activity row of one class; returns how many rows it has now."""
+    hourly = {}
+    for model in (Submission, ArchivedSubmission):
+        for row in (
+            model._base_manager.filter(assignment__class_assigned_id=class_id)
+            .annotate(hour=TruncHour('submitted_at', tzinfo=dt_timezone.utc))
+            .values('assignment_id', 'status', 'hour')
+            .annotate(total=Count('pk'))
+            .order_by()
+        ):
+            key = (row['assignment_id'], row['status'], row['hour'])
+            hourly[key] = hourly.get(key, 0) + row['total']
+
+    daily = {}
+    for (assignment_id, status, hour), total in hourly.items():
+        key = (assignment_id, status, bucket_start(hour, 'day'))
+        daily[key] = daily.get(key, 0) + total
+
+    rows = [
+        SubmissionActivity(
+            class_assigned_id=class_id, assignment_id=assignment_id, status=status,
+            granularity=granularity, bucket=bucket, count=total,
+        )
+        for granularity, buckets in (('hour', hourly), ('day', daily))
+        for (assignment_id, status, bucket), total in buckets.items()
+    ]
+    with transaction.atomic():
+        SubmissionActivity.objects.filter(class_assigned_id=class_id).delete()
+        SubmissionActivity.objects.bulk_create(rows, batch_size=batch_size)
+    return len(rows)
+
+
+def backfill(class_ids=None, batch_size=BATCH_SIZE, progress=None):
+    """``rebuild_class`` for each class (see ``derived.rebuild_classes``)."""
+    return rebuild_classes(lambda class_id: rebuild_class(class_id, batch_size), class_ids, progress)
+
+
+def series(granularity, start, end, **filters):
+    """
+    Submissions per bucket in ``[start, end)``, totalled and per status,
+    for a class (``class_assigned_id=``) or an assignment (``assignment_id=``).
+    Buckets without submissions are left out.
+    """
+    buckets = {}
+    for row in (
+        SubmissionActivity.objects.filter(granularity=granularity, bucket__gte=start, bucket__lt=end, **filters)
+        .values('bucket', 'status')
+        .annotate(total=Sum('count'))
+        .order_by('bucket')
+    ):
+        bucket = buckets.setdefault(
+            row['bucket'], {"bucket": row['bucket'], "total": 0, **{key: 0 for key, _ in Submission.STATUS_CHOICES}},
+        )
+        bucket[row['status']] = row['total']
+        bucket['total'] += row['total']
+    return list(buckets.values())
+
+
+def due_offsets(assignment, granularity):
+    """
+    Submissions of an assignment by distance from its due date: whole days
+    from ``due_date`` (0 is the due day), or hours from the end of it
+    (negative is before the deadline).
+    """
+    due_end = datetime.combine(assignment.due_date, time.min, tzinfo=dt_timezone.utc) + GRANULARITIES['day']
+    offsets = []
+    for row in (
+        SubmissionActivity.objects.filter(assignment=assignment, granularity=granularity)
+        .values('bucket')
+        .annotate(total=Sum('count'))
+        .order_by('bucket')
+    ):
+        if granularity == 'day':
+            offsets.append({"days": (row['bucket'].date() - assignment.due_date).days, "count": row['total']})
+        else:
+            offsets.append({"hours": int((row['bucket'] - due_end) / GRANULARITIES['hour']), "count": row['total']})
+    return offsets
@@ -0,0 +1,91 @@
+"""
+Primary/replica database routing with read-your-writes stickiness.
+
+Inside a request handled by ``ReplicaRoutingMiddleware``, reads of a
+safe-method request go to one of ``DATABASE_REPLICAS``. Everything else
+goes to ``default``: writes, reads in unsafe-method requests, reads after
+the request has written, and reads by a user who wrote within the last
+``REPLICA_STICKY_SECONDS``. Code running outside a request (management
+commands, background threads) always uses the primary.
+"""
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.functional import LazyObject, empty
+
+PRIMARY = 'default'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_state = ContextVar('db_routing_state', default=None)
+
+
+def pin_key(user_id):
+    return f"db-routing:pinned:{user_id}"
+
+
+def current_state():
+    return _state.get()
+
+
+class RoutingState:
+    """Per-request routing decisions, held in a context variable."""
+
+    def __init__(self, request):
+        self.request = request
+        self.use_primary = request.method not in SAFE_METHODS
+        self.wrote = False
+        self.pinned = None
+
+    def user(self):
+        # Never force a lazy user here: loading it would route a read back into us.
+        user = self.request.__dict__.get('user')
+        if isinstance(user, LazyObject):
+            user = None if user._wrapped is empty else user._wrapped
+        return user if user is not None and user.is_authenticated else None
+
+    def reads_from_primary(self):
+        if self.use_primary or self.wrote:
+            return True
+        if self.pinned is None:
+            user = self.user()
+            if user is None:
+                # Not authenticated yet (or anonymous); decide again on the next read.
+                return False
+            # Set first in case the cache backend itself reads through the router.
+            self.pinned = False
+            self.pinned = bool(cache.get(pin_key(user.pk)))
+        return self.pinned
+
+
+def activate(request):
+    return _state.set(RoutingState(request))
+
+
+def deactivate(token):
+    _state.reset(token)
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        replicas = [alias for alias in settings.DATABASE_REPLICAS if alias in settings.DATABASES]
+        if state is None or not replicas or state.reads_from_primary():
+            return PRIMARY
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {PRIMARY, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return None
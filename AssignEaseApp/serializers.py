@@ -1,7 +1,13 @@
 from rest_framework import serializers
-from .models import Profile, Class, ClassStudent, ProgrammingLanguage, Assignment, AssignmentQuestion, Submission, TeacherFeedback
+from .models import Profile, Class, ClassStudent, ProgrammingLanguage, Assignment, AssignmentQuestion, Submission, TeacherFeedback, SubmissionRevision, SubmissionFile
 from django.contrib.auth.models import User
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+
+from . import archive, identity, refcache, review, revocation
 
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
     @classmethod
@@ -16,6 +22,34 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
             token['role'] = None  
 
         return token
+
+
+class RevocationAwareTokenRefreshSerializer(TokenRefreshSerializer):
+    """Refuses revoked refresh tokens and, with BLACKLIST_AFTER_ROTATION, revokes the one it rotates."""
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        if revocation.is_revoked(refresh):
+            raise TokenError("Token has been revoked.")
+        data = super().validate(attrs)
+        if api_settings.ROTATE_REFRESH_TOKENS and api_settings.BLACKLIST_AFTER_ROTATION:
+            revocation.revoke(refresh)
+        return data
+
+class CachedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """Resolves through the request's identity map, for models without an IdentityMapManager (User)."""
+
+    def to_internal_value(self, data):
+        if self.pk_field is not None:
+            data = self.pk_field.to_internal_value(data)
+        try:
+            return identity.fetch(self.get_queryset(), pk=data)
+        except ObjectDoesNotExist:
+            self.fail('does_not_exist', pk_value=data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+
+
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
@@ -81,12 +115,12 @@ class ProfileSerializer(serializers.ModelSerializer):
 
 
 class ClassSerializer(serializers.ModelSerializer):
-    teacher = serializers.PrimaryKeyRelatedField(queryset=User.objects.all(), required=False)
+    teacher = CachedPrimaryKeyRelatedField(queryset=User.objects.all(), required=False)
 
     class Meta:
         model = Class
-        fields = ['id', 'class_name', 'teacher', 'created_at', 'updated_at']
-        read_only_fields = ['created_at', 'updated_at']
+        fields = ['id', 'class_name', 'teacher', 'created_at', 'updated_at', 'closed_at', 'student_count']
+        read_only_fields = ['created_at', 'updated_at', 'closed_at', 'student_count']
 
     def create(self, validated_data):
         if 'teacher' not in validated_data:
@@ -96,7 +130,8 @@ class ClassSerializer(serializers.ModelSerializer):
 class ClassStudentSerializer(serializers.ModelSerializer):
     student_name = serializers.CharField(source="student.profile.name", read_only=True)
     enrollment_number = serializers.CharField(source="student.profile.enrollment_number", read_only=True)
-    class_name = serializers.CharField(source="class_assigned.class_name", read_only=True)
+    class_name = serializers.SerializerMethodField()
+    student = CachedPrimaryKeyRelatedField(queryset=User.objects.all())
     class_assigned = serializers.PrimaryKeyRelatedField(queryset=Class.objects.all(), write_only=True)
 
     class Meta:
@@ -110,14 +145,29 @@ class ClassStudentSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("This student is already assigned to this class.")
         return data
 
+    def get_class_name(self, obj):
+        return refcache.class_name(obj.class_assigned_id)
+
+    # The save and the Class.student_count update commit together.
+    @transaction.atomic
+    def create(self, validated_data):
+        return super().create(validated_data)
+
+    @transaction.atomic
+    def update(self, instance, validated_data):
+        return super().update(instance, validated_data)
+
 
 class ClassStudentDetailSerializer(serializers.ModelSerializer):
-    class_assigned = serializers.StringRelatedField()
+    class_assigned = serializers.SerializerMethodField()
 
     class Meta:
         model = ClassStudent
         fields = ['id', 'student', 'class_assigned']
 
+    def get_class_assigned(self, obj):
+        return refcache.class_name(obj.class_assigned_id)
+
 class ProgrammingLanguageSerializer(serializers.ModelSerializer):
     class Meta:
         model = ProgrammingLanguage
@@ -129,14 +179,22 @@ class AssignmentQuestionSerializer(serializers.ModelSerializer):
         fields = ['id', 'question_text','assignment', 'created_at']
 
 class AssignmentSerializer(serializers.ModelSerializer):
-    class_name = serializers.CharField(source='class_assigned.class_name', read_only=True)
+    class_name = serializers.SerializerMethodField()
     questions = AssignmentQuestionSerializer(many=True, read_only=True, source='assignmentquestion_set')
     is_submitted = serializers.SerializerMethodField()
-    language_name = serializers.CharField(source="language.language_name", read_only=True)
+    language_name = serializers.SerializerMethodField()
 
     class Meta:
         model = Assignment
-        fields = ['id', 'title', 'description', 'due_date', 'class_name', 'questions', 'class_assigned', 'teacher', 'language','language_name', 'is_submitted']
+        fields = ['id', 'title', 'description', 'due_date', 'class_name', 'questions', 'class_assigned', 'teacher', 'language','language_name', 'is_submitted',
+                  'submitted_count', 'checked_count', 'reassigned_count', 'rejected_count']
+        read_only_fields = ['submitted_count', 'checked_count', 'reassigned_count', 'rejected_count']
+
+    def get_class_name(self, obj):
+        return refcache.class_name(obj.class_assigned_id)
+
+    def get_language_name(self, obj):
+        return refcache.language_name(obj.language_id)
 
     def get_is_submitted(self, obj):
         student_id = self.context.get('student_id', None)
@@ -148,9 +206,9 @@ class AssignmentSerializer(serializers.ModelSerializer):
 
 class SubmissionSerializer(serializers.ModelSerializer):
     title = serializers.CharField(source="assignment.title", read_only=True)
-    subject = serializers.CharField(source="assignment.class_assigned.class_name", read_only=True)
+    subject = serializers.SerializerMethodField()
     assignment = serializers.PrimaryKeyRelatedField(queryset=Assignment.objects.all())
-    student = serializers.PrimaryKeyRelatedField(queryset=User.objects.all(), required=False)
+    student = CachedPrimaryKeyRelatedField(queryset=User.objects.all(), required=False)
     question = serializers.PrimaryKeyRelatedField(queryset=AssignmentQuestion.objects.all())
     questiontext = serializers.CharField(source="question.question_text", read_only=True)
 
@@ -159,15 +217,50 @@ class SubmissionSerializer(serializers.ModelSerializer):
         fields = ['id', 'title', 'subject', 'assignment', 'student', 'question', 'questiontext', 'code', 'status', 'feedback', 'submitted_at', 'updated_at']
         read_only_fields = ['submitted_at', 'updated_at']
 
+    def get_subject(self, obj):
+        return refcache.class_name(obj.assignment.class_assigned_id)
+
+    def _check_open(self, class_id):
+        if archive.is_frozen(class_id):
+            raise serializers.ValidationError({"assignment": "This class is closed and no longer accepts submissions."})
+
+    # The save and the Assignment status counters commit together.
+    @transaction.atomic
     def create(self, validated_data):
         if 'student' not in validated_data:
             validated_data['student'] = self.context['request'].user
+        self._check_open(validated_data['assignment'].class_assigned_id)
         return Submission.objects.create(**validated_data)
 
+    @transaction.atomic
+    def update(self, instance, validated_data):
+        assignment = validated_data.get('assignment', instance.assignment)
+        self._check_open(assignment.class_assigned_id)
+        if validated_data.get('status', instance.status) != 'submitted':
+            review.clear_claim(instance)
+        return super().update(instance, validated_data)
+
+
+class SubmissionRevisionSerializer(serializers.ModelSerializer):
+    size = serializers.SerializerMethodField()
+
+    class Meta:
+        model = SubmissionRevision
+        fields = ['number', 'is_snapshot', 'size', 'created_at']
+
+    def get_size(self, obj):
+        return len(obj.data)
+
+
+class SubmissionFileSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = SubmissionFile
+        fields = ['id', 'submission', 'name', 'size', 'uploaded_at']
+
 
 class TeacherFeedbackSerializer(serializers.ModelSerializer):
     submission = serializers.PrimaryKeyRelatedField(queryset=Submission.objects.all())
-    teacher = serializers.PrimaryKeyRelatedField(queryset=User.objects.all(), required=False)
+    teacher = CachedPrimaryKeyRelatedField(queryset=User.objects.all(), required=False)
 
     class Meta:
         model = TeacherFeedback
@@ -0,0 +1,131 @@
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from . import identity, leaderboard, refcache, rollups, todo
+from .counters import adjust_student_count, submission_moved
+from .models import (
+    Profile, Class, ProgrammingLanguage, Assignment, AssignmentQuestion, ClassStudent, Submission,
+    SubmissionRevision, SubmissionFile,
+)
+from .revisions import record_revision
+
+_UNRECORDED = object()
+
+
+@receiver(post_save, sender=Submission)
+def track_submission_revision(sender, instance, created=False, raw=False, update_fields=None, **kwargs):
+    if raw or (update_fields is not None and 'code' not in update_fields):
+        return
+    # Status-only saves leave the code alone; only a changed code is a new revision.
+    if not created and getattr(instance, '_recorded_code', _UNRECORDED) == instance.code:
+        return
+    submission_id, code = instance.pk, instance.code
+    instance._recorded_code = code
+    transaction.on_commit(lambda: record_revision(submission_id, code))
+
+
+@receiver(post_delete, sender=Submission)
+def delete_submission_history(sender, instance, **kwargs):
+    SubmissionRevision.objects.filter(submission_id=instance.pk).delete()
+    SubmissionFile.objects.filter(submission_id=instance.pk).delete()
+
+
+@receiver(post_delete, sender=SubmissionFile)
+def delete_stored_file(sender, instance, **kwargs):
+    # Only remove the file from storage once the row is really gone.
+    name, storage = instance.file.name, instance.file.storage
+    transaction.on_commit(lambda: storage.delete(name))
+
+
+def _assignments(*keys):
+    """``{assignment_id: (class_id, due_date)}`` for the ``(assignment_id, status)`` buckets given, in one query."""
+    return {
+        pk: (class_id, due_date)
+        for pk, class_id, due_date in Assignment.objects.filter(
+            pk__in=[key[0] for key in keys if key is not None]
+        ).values_list('pk', 'class_assigned_id', 'due_date')
+    }
+
+
+@receiver(post_save, sender=Submission)
+def submission_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    current = (instance.assignment_id, instance.status)
+    previous = None if created else getattr(instance, '_counted', current)
+    submission_moved(previous, current)
+    if previous != current:
+        assignments = _assignments(previous, current)
+        rollups.submission_moved(instance.submitted_at, previous, current, assignments)
+        leaderboard.submission_moved(instance.student_id, instance.submitted_at, previous, current, assignments)
+    instance._counted = current
+    todo.submissions_received([(instance.student_id, instance.assignment_id)])
+
+
+@receiver(post_delete, sender=Submission)
+def submission_deleted(sender, instance, **kwargs):
+    counted = getattr(instance, '_counted', (instance.assignment_id, instance.status))
+    submission_moved(counted, None)
+    assignments = _assignments(counted)
+    rollups.submission_moved(instance.submitted_at, counted, None, assignments)
+    leaderboard.submission_moved(instance.student_id, instance.submitted_at, counted, None, assignments)
+    todo.submission_removed(instance.student_id, instance.assignment_id)
+
+
+@receiver(post_save, sender=ClassStudent)
+def class_student_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    previous = None if created else getattr(instance, '_counted', instance.class_assigned_id)
+    if previous != instance.class_assigned_id:
+        adjust_student_count(previous, -1)
+        adjust_student_count(instance.class_assigned_id, 1)
+        if previous is not None:
+            todo.student_unenrolled(previous, instance.student_id)
+            leaderboard.student_unenrolled(previous, instance.student_id)
+        todo.students_enrolled(instance.class_assigned_id, [instance.student_id])
+        leaderboard.students_enrolled(instance.class_assigned_id, [instance.student_id])
+    instance._counted = instance.class_assigned_id
+
+
+@receiver(post_delete, sender=ClassStudent)
+def class_student_deleted(sender, instance, **kwargs):
+    class_id = getattr(instance, '_counted', instance.class_assigned_id)
+    adjust_student_count(class_id, -1)
+    todo.student_unenrolled(class_id, instance.student_id)
+    leaderboard.student_unenrolled(class_id, instance.student_id)
+
+
+@receiver(post_save, sender=Assignment)
+def assignment_saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    todo.sync_assignment(instance)
+
+
+# Models whose instances can sit in the identity map. Receivers are connected
+# per sender so other models keep Django's fast-delete path.
+IDENTITY_MAPPED_MODELS = [User, Profile, Class, ProgrammingLanguage, Assignment, AssignmentQuestion, Submission]
+
+
+def clear_identity_map(sender, **kwargs):
+    identity.clear()
+
+
+for model in IDENTITY_MAPPED_MODELS:
+    post_save.connect(clear_identity_map, sender=model, dispatch_uid=f'identity_map_save_{model._meta.label}')
+    post_delete.connect(clear_identity_map, sender=model, dispatch_uid=f'identity_map_delete_{model._meta.label}')
+
+
+@receiver(post_save, sender=ProgrammingLanguage)
+@receiver(post_delete, sender=ProgrammingLanguage)
+def invalidate_language_name(sender, instance, **kwargs):
+    refcache.languages.invalidate(instance.pk)
+
+
+@receiver(post_save, sender=Class)
+@receiver(post_delete, sender=Class)
+def invalidate_class_name(sender, instance, **kwargs):
+    refcache.class_names.invalidate(instance.pk)
@@ -0,0 +1,190 @@
+"""
+Submitting every answer of an assignment in one request.
+
+``submit_assignment`` checks all question ids, the assignment and the
+student's enrolment with a single query, then upserts the answers in one
+transaction with ``bulk_create(update_conflicts=True)`` on the
+(student, assignment, question) unique key. Bulk writes send no
+``post_save``, so the counters, the to-do queue, the activity rollups, the
+leaderboard and the revision history are updated here directly, as the
+other bulk paths do.
+"""
+from django.db import connection, transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from . import archive, leaderboard, rollups, todo
+from .counters import adjust_status_count
+from .models import Assignment, AssignmentQuestion, ArchivedSubmission, ClassStudent, Submission
+from .revisions import record_first_revisions, record_revision
+
+# Answers to submissions in these states are final and are not overwritten.
+LOCKED_STATUSES = ('checked', 'rejected')
+
+
+class SubmitError(Exception):
+    def __init__(self, message, status_code):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def _error(question, message, **extra):
+    return {"question": question, **extra, "status": "error", "error": message}
+
+
+def _parse(answers):
+    """
+    Return ``{question id: code}`` and, in answer order, either the question
+    id of each answer or the error result that rejects it.
+    """
+    codes, order = {}, []
+    for answer in answers:
+        question = answer.get('question') if isinstance(answer, dict) else None
+        code = answer.get('code') if isinstance(answer, dict) else None
+        if not isinstance(question, int) and not (isinstance(question, str) and question.isdigit()):
+            order.append(_error(question, "question must be an id."))
+        elif not isinstance(code, str):
+            order.append(_error(question, "code must be a string."))
+        elif int(question) in codes:
+            order.append(_error(int(question), "question answered more than once."))
+        else:
+            codes[int(question)] = code
+            order.append(int(question))
+    return codes, order
+
+
+def submit_assignment(student, assignment_id, answers):
+    """
+    Create or update ``student``'s submissions for ``assignment_id``.
+
+    ``answers`` is a list of ``{"question": id, "code": str}``. Returns one
+    result per answer; raises ``SubmitError`` when the whole request is refused.
+    """
+    if not isinstance(answers, list) or not answers:
+        raise SubmitError("'answers' must be a non-empty list.", 400)
+    codes, order = _parse(answers)
+
+    # One query: the questions that belong to this (live) assignment, whether the
+    # student is enrolled and whether the class still accepts submissions.
+    rows = list(
+        AssignmentQuestion.objects.filter(
+            assignment_id=assignment_id,
+            assignment__class_assigned__deleted_at__isnull=True,
+            pk__in=list(codes),
+        ).annotate(
+            enrolled=Exists(ClassStudent.objects.filter(
+                class_assigned=OuterRef('assignment__class_assigned'), student=student,
+            )),
+            frozen=Exists(archive.frozen_classes().filter(pk=OuterRef('assignment__class_assigned'))),
+        ).values_list('pk', 'assignment__class_assigned_id', 'enrolled', 'assignment__due_date', 'frozen')
+    )
+    if rows:
+        enrolled = rows[0][2]
+    else:
+        # No question matched; still refuse outsiders before saying which ids are wrong.
+        enrolled = Assignment.objects.filter(
+            pk=assignment_id, class_assigned__deleted_at__isnull=True,
+        ).annotate(
+            enrolled=Exists(ClassStudent.objects.filter(class_assigned=OuterRef('class_assigned'), student=student)),
+        ).values_list('enrolled', flat=True).first()
+        if enrolled is None:
+            raise SubmitError("Assignment not found.", 404)
+    if not enrolled:
+        raise SubmitError("You are not enrolled in this assignment's class.", 403)
+    if rows and rows[0][4]:
+        raise SubmitError("This class is closed and no longer accepts submissions.", 409)
+    valid = {row[0] for row in rows}
+    results = {question: _error(question, "not a question of this assignment.") for question in codes}
+    if not valid:
+        return [results[item] if isinstance(item, int) else item for item in order]
+
+    class_id, due_date = rows[0][1], rows[0][3]
+    now = timezone.now()
+    with transaction.atomic():
+        # Serializes concurrent submits by the same student, so the counters stay exact.
+        if not ClassStudent.objects.select_for_update().filter(student=student, class_assigned_id=class_id).exists():
+            raise SubmitError("You are not enrolled in this assignment's class.", 403)
+        existing = {
+            question: (pk, status, code, submitted_at)
+            for pk, question, status, code, submitted_at in Submission.objects.select_for_update()
+            .filter(student=student, assignment_id=assignment_id, question_id__in=valid)
+            .values_list('pk', 'question_id', 'status', 'code', 'submitted_at')
+        }
+        # Answers archived since the check above are as final as checked ones.
+        archived = dict(
+            ArchivedSubmission.objects
+            .filter(student=student, assignment_id=assignment_id, question_id__in=valid)
+            .values_list('question_id', 'pk')
+        )
+
+        upsert = []
+        for question in sorted(valid):
+            if question in archived:
+                results[question] = _error(
+                    question, "archived; it can no longer be changed.", submission=archived[question],
+                )
+                continue
+            if question in existing and existing[question][1] in LOCKED_STATUSES:
+                results[question] = _error(
+                    question, f"already {existing[question][1]}; it can no longer be changed.",
+                    submission=existing[question][0],
+                )
+                continue
+            upsert.append(Submission(
+                student=student, assignment_id=assignment_id, question_id=question, code=codes[question],
+                status='submitted', submitted_at=now, updated_at=now, claimed_by=None, claim_expires_at=None,
+            ))
+
+        if upsert:
+            unique_fields = None
+            if connection.features.supports_update_conflicts_with_target:
+                unique_fields = ['student', 'assignment', 'question']
+            Submission.objects.bulk_create(
+                upsert,
+                update_conflicts=True,
+                unique_fields=unique_fields,
+                update_fields=['code', 'status', 'updated_at', 'claimed_by', 'claim_expires_at'],
+            )
+            ids = dict(
+                Submission.objects.filter(
+                    student=student, assignment_id=assignment_id, question_id__in=[s.question_id for s in upsert],
+                ).values_list('question_id', 'pk')
+            )
+
+            deltas = {'submitted': len(upsert)}
+            activity = []
+            for submission in upsert:
+                previous = existing.get(submission.question_id)
+                if previous is None:
+                    activity.append((class_id, assignment_id, 'submitted', now, 1))
+                else:
+                    deltas[previous[1]] = deltas.get(previous[1], 0) - 1
+                    activity.append((class_id, assignment_id, previous[1], previous[3], -1))
+                    activity.append((class_id, assignment_id, 'submitted', previous[3], 1))
+            for status, delta in deltas.items():
+                adjust_status_count(assignment_id, status, delta)
+            rollups.record(activity)
+            # Resubmitting keeps the submission's assignment and submitted_at, and checked
+            # answers are locked, so only new submissions move the leaderboard.
+            new = sum(submission.question_id not in existing for submission in upsert)
+            leaderboard.apply(
+                class_id, student.pk, on_time=new * leaderboard.is_on_time(now, due_date), total=new,
+            )
+            todo.submissions_received([(student.pk, assignment_id)])
+
+            created, changed = [], []
+            for submission in upsert:
+                question = submission.question_id
+                previous = existing.get(question)
+                results[question] = {
+                    "question": question, "submission": ids[question],
+                    "status": "updated" if previous is not None else "created",
+                }
+                if previous is None:
+                    created.append((ids[question], submission.code))
+                elif previous[2] != submission.code:
+                    changed.append((ids[question], submission.code))
+            record_first_revisions(created)
+            transaction.on_commit(lambda: [record_revision(pk, code) for pk, code in changed])
+
+    return [results[item] if isinstance(item, int) else item for item in order]
@@ -1,3 +1,922 @@
-from django.test import TestCase
+import io
+import json
+import shutil
+import tempfile
+import time
+import warnings
+from datetime import date, datetime, timezone as dt_timezone
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.management import call_command
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.http import HttpResponse
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection, transaction
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from .archive import archivable_classes, archive_class
+from .cohort import import_cohort, read_csv
+from . import identity, leaderboard, refcache, review, revocation, rollups, routers
+from .counters import reconcile
+from .deletion import purge_class
+from .middleware import IdentityMapMiddleware, ReplicaRoutingMiddleware
+from .pagination import EstimatedCountPaginator
+from .models import (
+    Profile, Class, ClassStudent, ProgrammingLanguage, Assignment, AssignmentQuestion, Submission, TeacherFeedback,
+    ArchivedSubmission, SubmissionRevision, PendingAssignment, SubmissionFile, RevokedToken, SubmissionActivity,
+    LeaderboardEntry, CohortImport,
+)
+from .projections import submission_rows, class_student_rows
+from .renderers import FastJSONRenderer
+from .revisions import SNAPSHOT_INTERVAL, apply_delta, make_delta, revision_code
+from .serializers import SubmissionSerializer, ClassStudentSerializer
+from .todo import rebuild as rebuild_todo
+
+
+# PBKDF2 at full strength would dominate the run time.
+FAST_HASHERS = override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+
+
+def make_user(username, role, name=None):
+    user = User.objects.create_user(username=username, password='pass12345', email=f'{username}@example.com')
+    Profile.objects.create(user=user, role=role, name=name or username.title(), enrollment_number=f'EN-{username}')
+    return user
+
+
+def api_client(user=None):
+    client = APIClient()
+    if user is not None:
+        client.force_authenticate(user)
+    return client
+
+
+@FAST_HASHERS
+class ClassroomTestCase(TestCase):
+    """A teacher's class with one assignment of two questions and three enrolled students."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = make_user('teacher', 'teacher')
+        cls.klass = Class.objects.create(class_name='Algorithms', teacher=cls.teacher)
+        cls.language = ProgrammingLanguage.objects.create(language_name='Python')
+        cls.assignment = Assignment.objects.create(
+            class_assigned=cls.klass, title='Sorting', description='Sort things.',
+            due_date=date(2030, 1, 1), teacher=cls.teacher, language=cls.language,
+        )
+        cls.questions = [
+            AssignmentQuestion.objects.create(assignment=cls.assignment, question_text=f'Question {i}')
+            for i in range(2)
+        ]
+        cls.students = [make_user(f'student{i}', 'student') for i in range(3)]
+        for student in cls.students:
+            ClassStudent.objects.create(student=student, class_assigned=cls.klass)
+
+    def submit(self, student, question, code='print(1)', status='submitted'):
+        return Submission.objects.create(
+            student=student, assignment=self.assignment, question=question, code=code, status=status,
+        )
+
+
+class ProjectionTests(ClassroomTestCase):
+    def test_submission_rows_match_the_serializer(self):
+        for student in self.students:
+            for question in self.questions:
+                self.submit(student, question)
+        queryset = Submission.objects.order_by('pk')
+        self.assertEqual(submission_rows(queryset), SubmissionSerializer(queryset, many=True).data)
+
+    def test_class_student_rows_match_the_serializer(self):
+        queryset = ClassStudent.objects.order_by('pk')
+        self.assertEqual(class_student_rows(queryset), ClassStudentSerializer(queryset, many=True).data)
+
+    def test_list_endpoints_serve_the_same_rows_either_way(self):
+        self.submit(self.students[0], self.questions[0])
+        client = api_client(self.teacher)
+        for url in ('/api/submissions/', '/api/classstudents/'):
+            with override_settings(FAST_LIST_ENDPOINTS=True):
+                fast = client.get(url)
+            with override_settings(FAST_LIST_ENDPOINTS=False):
+                slow = client.get(url)
+            self.assertEqual(fast.status_code, 200)
+            self.assertEqual(json.loads(fast.content), json.loads(slow.content))
+
+
+class FastJSONRendererTests(TestCase):
+    def test_output_matches_the_stock_renderer(self):
+        data = {
+            'when': datetime(2030, 1, 2, 3, 4, 5, 678000, tzinfo=dt_timezone.utc),
+            'day': date(2030, 1, 2),
+            'text': 'line\u2028separator \u00e9',
+            'rows': [1, None, True],
+        }
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+
+@override_settings(PURGE_DELETED_CLASSES_IN_BACKGROUND=False)
+class ClassDeletionTests(ClassroomTestCase):
+    def test_delete_hides_the_class_until_it_is_purged(self):
+        self.submit(self.students[0], self.questions[0])
+        response = api_client(self.teacher).delete(f'/api/classes/{self.klass.pk}/delete/')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(Class.objects.filter(pk=self.klass.pk).exists())
+        self.assertTrue(Class.all_objects.filter(pk=self.klass.pk).exists())
+        self.assertNotIn(self.klass.pk, [row['id'] for row in api_client(self.teacher).get('/api/classes/').data])
+
+        # class, assignment, 2 questions, 3 enrolments and 1 submission (plus derived rows).
+        self.assertGreaterEqual(purge_class(self.klass.pk, batch_size=1), 8)
+        self.assertFalse(Class.all_objects.filter(pk=self.klass.pk).exists())
+        self.assertFalse(Assignment.objects.filter(pk=self.assignment.pk).exists())
+        self.assertFalse(ClassStudent.objects.filter(class_assigned_id=self.klass.pk).exists())
+        self.assertFalse(Submission.objects.exists())
+        self.assertEqual(purge_class(self.klass.pk), 0)
+
+    def test_deleted_classes_refuse_writes_until_they_are_purged(self):
+        submission = self.submit(self.students[0], self.questions[0])
+        api_client(self.teacher).delete(f'/api/classes/{self.klass.pk}/delete/')
+        client = api_client(self.students[1])
+        response = client.post('/api/submissions/', {
+            'assignment': self.assignment.pk, 'question': self.questions[0].pk, 'student': self.students[1].pk,
+            'code': 'late', 'status': 'submitted',
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        response = api_client(self.students[0]).patch(f'/api/submissions/{submission.pk}/', {'code': 'late'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(client.get(f'/api/assignments/{self.assignment.pk}/').status_code, 404)
+        self.assertEqual(client.get(f'/api/assignment_details/{self.assignment.pk}/').status_code, 404)
+        self.assertNotIn(self.assignment.pk, [row['id'] for row in client.get('/api/assignments/').data])
+        self.assertEqual(Submission.objects.get().pk, submission.pk)
+        self.assertGreater(purge_class(self.klass.pk), 0)
+        self.assertFalse(Assignment.objects.filter(pk=self.assignment.pk).exists())
+
+    def test_only_the_teacher_can_delete_the_class(self):
+        response = api_client(self.students[0]).delete(f'/api/classes/{self.klass.pk}/delete/')
+        self.assertEqual(response.status_code, 403)
+        self.assertIsNone(Class.objects.get(pk=self.klass.pk).deleted_at)
+
+
+class ArchiveTests(ClassroomTestCase):
+    def close_class(self):
+        response = api_client(self.teacher).post(f'/api/classes/{self.klass.pk}/close/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_closed_classes_are_archived_and_still_readable(self):
+        submission = self.submit(self.students[0], self.questions[0], code='print(42)', status='checked')
+        TeacherFeedback.objects.create(submission=submission, teacher=self.teacher, feedback='Nice.')
+        self.assertNotIn(self.klass, archivable_classes())
+        self.close_class()
+        self.assertIn(self.klass, archivable_classes())
+
+        self.assertEqual(archive_class(self.klass.pk, batch_size=1), 1)
+        self.assertFalse(Submission.objects.exists())
+        self.assertFalse(TeacherFeedback.objects.exists())
+        self.assertTrue(ArchivedSubmission.objects.filter(pk=submission.pk).exists())
+
+        client = api_client(self.students[0])
+        response = client.get(f'/api/submissions/{submission.pk}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['code'], response.data['status']), ('print(42)', 'checked'))
+        self.assertEqual(client.get('/api/submissions/').data, [])
+        self.assertEqual([row['id'] for row in client.get('/api/submissions/?archived=true').data], [submission.pk])
+
+    def test_closed_classes_refuse_new_answers(self):
+        submission = self.submit(self.students[0], self.questions[0])
+        self.close_class()
+        client = api_client(self.students[1])
+        response = client.post('/api/submissions/', {
+            'assignment': self.assignment.pk, 'question': self.questions[0].pk, 'student': self.students[1].pk,
+            'code': 'late', 'status': 'submitted',
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        response = api_client(self.students[0]).patch(f'/api/submissions/{submission.pk}/', {'code': 'late'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        response = client.post(f'/api/assignments/{self.assignment.pk}/submit/', {
+            'answers': [{'question': self.questions[1].pk, 'code': 'late'}],
+        }, format='json')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(Submission.objects.get(pk=submission.pk).code, 'print(1)')
+        self.assertEqual(Submission.objects.count(), 1)
+
+
+class RevisionTests(ClassroomTestCase):
+    def test_deltas_rebuild_the_new_code(self):
+        old = 'def f():\n    return 1\n'
+        new = 'import math\ndef f():\n    return math.pi\n'
+        self.assertEqual(apply_delta(old, make_delta(old, new)), new)
+
+    def test_every_code_change_is_kept(self):
+        client = api_client(self.students[0])
+        with self.captureOnCommitCallbacks(execute=True):
+            submission = self.submit(self.students[0], self.questions[0], code='v1')
+        versions = ['v1'] + [f'v1\nline {i}' for i in range(SNAPSHOT_INTERVAL + 1)]
+        for code in versions[1:]:
+            with self.captureOnCommitCallbacks(execute=True):
+                client.patch(f'/api/submissions/{submission.pk}/', {'code': code}, format='json')
+
+        revisions = client.get(f'/api/submissions/{submission.pk}/revisions/').data
+        self.assertEqual(len(revisions), len(versions))
+        self.assertEqual([row['number'] for row in revisions if row['is_snapshot']], [1, SNAPSHOT_INTERVAL + 1])
+        for number, code in enumerate(versions, start=1):
+            self.assertEqual(revision_code(submission.pk, number), code)
+        response = client.get(f'/api/submissions/{submission.pk}/revisions/3/?diff=2')
+        self.assertIn('+line 1', response.data['diff'])
+
+    @override_settings(IDENTITY_MAP_ENABLED=False)
+    def test_status_changes_do_not_add_revisions(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            submission = self.submit(self.students[0], self.questions[0])
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            response = api_client(self.teacher).patch(
+                f'/api/submissions/{submission.pk}/update-status/', {'status': 'checked'}, format='json',
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(callbacks, [])
+        self.assertEqual(SubmissionRevision.objects.filter(submission_id=submission.pk).count(), 1)
+
+
+class CounterTests(ClassroomTestCase):
+    def counts(self):
+        assignment = Assignment.objects.get(pk=self.assignment.pk)
+        return (
+            assignment.submitted_count, assignment.checked_count,
+            assignment.reassigned_count, assignment.rejected_count,
+        )
+
+    def test_counters_follow_enrolments_and_submissions(self):
+        self.assertEqual(Class.objects.get(pk=self.klass.pk).student_count, 3)
+        ClassStudent.objects.filter(student=self.students[2]).get().delete()
+        self.assertEqual(Class.objects.get(pk=self.klass.pk).student_count, 2)
+
+        first = self.submit(self.students[0], self.questions[0])
+        self.submit(self.students[1], self.questions[0])
+        self.assertEqual(self.counts(), (2, 0, 0, 0))
+        api_client(self.teacher).patch(f'/api/submissions/{first.pk}/update-status/', {'status': 'checked'}, format='json')
+        self.assertEqual(self.counts(), (1, 1, 0, 0))
+        Submission.objects.get(pk=first.pk).delete()
+        self.assertEqual(self.counts(), (1, 0, 0, 0))
+        self.assertEqual(reconcile(), [])
+
+    def test_reconcile_repairs_drift(self):
+        self.submit(self.students[0], self.questions[0])
+        Assignment.objects.filter(pk=self.assignment.pk).update(submitted_count=7)
+        Class.objects.filter(pk=self.klass.pk).update(student_count=0)
+        drifted = {(model, pk) for model, pk, stored, actual in reconcile(fix=True)}
+        self.assertEqual(drifted, {('Assignment', self.assignment.pk), ('Class', self.klass.pk)})
+        self.assertEqual(self.counts(), (1, 0, 0, 0))
+        self.assertEqual(reconcile(), [])
+
+
+COHORT_CSV = """name,username,email,enrollment_number,role,password
+Ada,ada,ada@example.com,EN-1,student,
+Grace,grace,grace@example.com,EN-2,student,s3cret-pass
+Alan,alan,alan@example.com,,teacher,
+Bad,bad name,bad@example.com,EN-3,student,
+Long,long,long@example.com,{long},student,
+Copy,ada,copy@example.com,EN-4,student,
+Taken,teacher,taken@example.com,EN-5,student,
+""".format(long='9' * 60)
+
+
+class CohortImportTests(ClassroomTestCase):
+    def test_valid_rows_are_created_and_the_rest_reported(self):
+        report = import_cohort(read_csv(io.StringIO(COHORT_CSV)), self.klass, workers=1)
+        self.assertEqual(
+            [row['status'] for row in report],
+            ['created', 'created', 'created', 'error', 'error', 'error', 'error'],
+        )
+        self.assertIn('username', report[3]['errors'][0])
+        self.assertIn('at most 50 characters', report[4]['errors'][0])
+        self.assertEqual(report[5]['errors'], ["username appears more than once in the file."])
+        self.assertEqual(report[6]['errors'], ["username already exists."])
+
+        ada = User.objects.get(username='ada')
+        self.assertTrue(ada.check_password(report[0]['password']))
+        self.assertIsNone(report[1]['password'])
+        self.assertTrue(User.objects.get(username='grace').check_password('s3cret-pass'))
+        self.assertEqual(ada.profile.enrollment_number, 'EN-1')
+        self.assertEqual([row['enrolled'] for row in report[:3]], [True, True, False])
+        self.assertEqual(Class.objects.get(pk=self.klass.pk).student_count, 5)
+
+    def test_missing_columns_are_rejected(self):
+        with self.assertRaises(ValueError):
+            list(read_csv(io.StringIO("username,email\nada,ada@example.com\n")))
+
+    def test_only_teachers_can_import(self):
+        upload = SimpleUploadedFile('cohort.csv', COHORT_CSV.encode())
+        response = api_client(self.students[0]).post('/api/users/import/', {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, 403)
+
+
+@FAST_HASHERS
+class CohortImportEndpointTests(TransactionTestCase):
+    # The import runs on its own thread and connection, so the data must be committed.
+
+    def test_upload_is_imported_in_the_background(self):
+        teacher = make_user('teacher', 'teacher')
+        client = api_client(teacher)
+        upload = SimpleUploadedFile('cohort.csv', COHORT_CSV.encode())
+        response = client.post('/api/users/import/', {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['rows'], 7)
+
+        url = f"/api/users/import/{response.data['job']}/"
+        deadline = time.monotonic() + 30
+        while (job := client.get(url).data)['status'] == 'running' and time.monotonic() < deadline:
+            time.sleep(0.05)
+        self.assertEqual((job['status'], job['created'], job['failed']), ('done', 3, 4))
+        self.assertTrue(User.objects.filter(username='grace').exists())
+        self.assertEqual(api_client(make_user('other', 'teacher')).get(url).status_code, 404)
+
+        # The job lives in the database, so every worker can answer the poll.
+        cache.clear()
+        self.assertEqual(client.get(url).data['status'], 'done')
+        CohortImport.objects.update(expires_at=datetime(2000, 1, 1, tzinfo=dt_timezone.utc))
+        self.assertEqual(client.get(url).status_code, 404)
+        upload = SimpleUploadedFile('cohort.csv', b'name,username,email,role\n')
+        self.assertEqual(client.post('/api/users/import/', {'file': upload}, format='multipart').status_code, 202)
+        self.assertFalse(CohortImport.objects.filter(pk=response.data['job']).exists())
+
+
+@FAST_HASHERS
+class ReplicaRoutingTests(TestCase):
+    def setUp(self):
+        replicas = override_settings(
+            DATABASES={**settings.DATABASES, 'replica': settings.DATABASES['default']},
+            DATABASE_REPLICAS=['replica'],
+        )
+        with warnings.catch_warnings():
+            # Only the router reads the extra alias; no connection is ever opened to it.
+            warnings.simplefilter('ignore')
+            replicas.enable()
+        self.addCleanup(replicas.disable)
+        cache.clear()
+        self.router = routers.PrimaryReplicaRouter()
+        self.user = make_user('student', 'student')
+
+    def route(self, method, user=None, write=False):
+        request = getattr(RequestFactory(), method.lower())('/api/classes/')
+        request.user = user or AnonymousUser()
+        token = routers.activate(request)
+        try:
+            if write:
+                self.router.db_for_write(User)
+            return self.router.db_for_read(User)
+        finally:
+            routers.deactivate(token)
+
+    def test_reads_outside_requests_use_the_primary(self):
+        self.assertEqual(self.router.db_for_read(User), 'default')
+
+    def test_safe_requests_read_from_a_replica(self):
+        self.assertEqual(self.route('GET'), 'replica')
+        self.assertEqual(self.route('GET', self.user), 'replica')
+        self.assertEqual(self.route('POST', self.user), 'default')
+        self.assertEqual(self.route('GET', self.user, write=True), 'default')
+
+    def test_writers_are_pinned_to_the_primary(self):
+        def write(request):
+            self.router.db_for_write(User)
+            return HttpResponse()
+
+        request = RequestFactory().post('/api/submissions/')
+        request.user = self.user
+        ReplicaRoutingMiddleware(write)(request)
+        self.assertEqual(self.route('GET', self.user), 'default')
+        self.assertEqual(self.route('GET', make_user('other', 'student')), 'replica')
+
+
+class TodoTests(ClassroomTestCase):
+    def todo(self, student, **params):
+        response = api_client(student).get('/api/todo/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_pending_assignments_come_and_go(self):
+        later = Assignment.objects.create(
+            class_assigned=self.klass, title='Graphs', description='Walk them.',
+            due_date=date(2031, 1, 1), teacher=self.teacher, language=self.language,
+        )
+        question = AssignmentQuestion.objects.create(assignment=later, question_text='BFS')
+        student = self.students[0]
+        self.assertEqual([row['assignment'] for row in self.todo(student)['results']], [self.assignment.pk, later.pk])
+
+        submission = self.submit(student, self.questions[0])
+        self.assertEqual([row['assignment'] for row in self.todo(student)['results']], [later.pk])
+        submission.delete()
+        self.assertEqual(len(self.todo(student)['results']), 2)
+
+        Submission.objects.create(student=student, assignment=later, question=question, code='x', status='submitted')
+        ClassStudent.objects.filter(student=self.students[1]).delete()
+        self.assertEqual(self.todo(self.students[1])['results'], [])
+        before = set(PendingAssignment.objects.values_list('student_id', 'assignment_id'))
+        PendingAssignment.objects.all().delete()
+        rebuild_todo()
+        self.assertEqual(set(PendingAssignment.objects.values_list('student_id', 'assignment_id')), before)
+
+    def test_pages_follow_the_cursor(self):
+        for day in range(2, 5):
+            Assignment.objects.create(
+                class_assigned=self.klass, title=f'Week {day}', description='More.',
+                due_date=date(2030, 1, day), teacher=self.teacher, language=self.language,
+            )
+        student, seen, after = self.students[0], [], None
+        while True:
+            page = self.todo(student, limit=0, **({'after': after} if after else {}))
+            self.assertEqual(len(page['results']), 1)
+            seen += [row['title'] for row in page['results']]
+            after = page['next']
+            if after is None:
+                break
+        self.assertEqual(seen, ['Sorting', 'Week 2', 'Week 3', 'Week 4'])
+        response = api_client(student).get('/api/todo/', {'after': 'nonsense'})
+        self.assertEqual(response.status_code, 400)
+
+
+class SubmissionFileTests(ClassroomTestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        limits = override_settings(MEDIA_ROOT=media_root, SUBMISSION_FILE_MAX_SIZE=10, SUBMISSION_FILES_MAX_TOTAL_SIZE=15)
+        limits.enable()
+        self.addCleanup(limits.disable)
+        self.submission = self.submit(self.students[0], self.questions[0])
+        self.url = f'/api/submissions/{self.submission.pk}/files/'
+        self.client = api_client(self.students[0])
+
+    def upload(self, *contents):
+        files = [SimpleUploadedFile(f'part{i}.txt', content) for i, content in enumerate(contents)]
+        return self.client.post(self.url, {'files': files}, format='multipart')
+
+    def test_files_are_stored_and_downloadable(self):
+        response = self.upload(b'hello', b'world!')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([(row['name'], row['size']) for row in response.data], [('part0.txt', 5), ('part1.txt', 6)])
+        download = self.client.get(f"{self.url}{response.data[0]['id']}/")
+        self.assertEqual(b''.join(download.streaming_content), b'hello')
+        download.close()
+        self.assertEqual(len(self.client.get(self.url).data), 2)
+
+    def test_limits_are_enforced_while_streaming(self):
+        self.assertEqual(self.upload(b'x' * 11).status_code, 413)
+        self.assertEqual(self.upload(b'x' * 10).status_code, 201)
+        # 10 bytes are stored already, so 6 more break the 15 byte total.
+        self.assertEqual(self.upload(b'x' * 6).status_code, 413)
+        self.assertEqual(SubmissionFile.objects.filter(submission=self.submission).count(), 1)
+
+
+class EstimatedCountTests(ClassroomTestCase):
+    def test_only_big_unfiltered_tables_use_the_estimate(self):
+        with override_settings(ESTIMATED_COUNT_THRESHOLD=1000), \
+                mock.patch('AssignEaseApp.pagination.estimated_row_count', return_value=5000):
+            self.assertEqual(EstimatedCountPaginator(User.objects.order_by('pk'), 10).count, 5000)
+            self.assertEqual(EstimatedCountPaginator(User.objects.filter(username='teacher').order_by('pk'), 10).count, 1)
+        with override_settings(ESTIMATED_COUNT_THRESHOLD=10_000), \
+                mock.patch('AssignEaseApp.pagination.estimated_row_count', return_value=5000):
+            self.assertEqual(EstimatedCountPaginator(User.objects.order_by('pk'), 10).count, 4)
+
+    def test_every_changelist_renders(self):
+        superuser = User.objects.create_superuser('admin', 'admin@example.com', 'pass12345')
+        self.client.force_login(superuser)
+        for student in self.students:
+            self.submit(student, self.questions[0])
+        for model in admin.site._registry:
+            if model._meta.app_label != 'AssignEaseApp':
+                continue
+            with self.subTest(model=model.__name__):
+                response = self.client.get(f'/admin/AssignEaseApp/{model._meta.model_name}/')
+                self.assertEqual(response.status_code, 200)
+
+    def test_changelist_queries_do_not_grow_with_the_rows(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'pass12345'))
+        queries = []
+        for question in self.questions:
+            for student in self.students:
+                self.submit(student, question)
+            with CaptureQueriesContext(connection) as captured:
+                self.assertEqual(self.client.get('/admin/AssignEaseApp/submission/').status_code, 200)
+            queries.append(len(captured))
+        self.assertEqual(queries[0], queries[1])
+
+
+class BatchTests(ClassroomTestCase):
+    def batch(self, user, requests):
+        return api_client(user).post('/api/batch/', {'requests': requests}, format='json')
+
+    def test_sub_requests_answer_like_the_endpoints(self):
+        client = api_client(self.teacher)
+        response = self.batch(self.teacher, [
+            {'method': 'GET', 'path': f'class/simple/{self.klass.pk}/'},
+            {'method': 'GET', 'path': '/api/classstudents/'},
+            {'method': 'PATCH', 'path': f'assignments/{self.assignment.pk}/', 'body': {'title': 'Sorting II'}},
+            {'method': 'GET', 'path': 'no-such-endpoint/'},
+            {'method': 'POST', 'path': 'batch/', 'body': {'requests': []}},
+        ])
+        self.assertEqual(response.status_code, 200)
+        responses = response.data['responses']
+        self.assertEqual([row['status'] for row in responses], [200, 200, 200, 404, 400])
+        self.assertEqual(responses[0]['body'], client.get(f'/api/class/simple/{self.klass.pk}/').data)
+        self.assertEqual(json.loads(json.dumps(responses[1]['body'])), json.loads(client.get('/api/classstudents/').content))
+        self.assertEqual(Assignment.objects.get(pk=self.assignment.pk).title, 'Sorting II')
+
+    def test_batches_are_bounded_and_authenticated(self):
+        self.assertEqual(api_client().post('/api/batch/', {'requests': [{'path': 'todo/'}]}, format='json').status_code, 401)
+        self.assertEqual(self.batch(self.teacher, []).status_code, 400)
+        with override_settings(BATCH_MAX_REQUESTS=2):
+            self.assertEqual(self.batch(self.teacher, [{'path': 'todo/'}] * 3).status_code, 400)
+
+
+class IdentityMapTests(ClassroomTestCase):
+    def test_lookups_inside_a_scope_share_one_instance(self):
+        with identity.scope():
+            assignment = Assignment.objects.get(pk=self.assignment.pk)
+            with self.assertNumQueries(1):
+                self.assertIs(Assignment.objects.get(pk=self.assignment.pk), assignment)
+                questions = list(AssignmentQuestion.objects.filter(assignment=assignment))
+                self.assertTrue(all(question.assignment is assignment for question in questions))
+        with self.assertNumQueries(2):
+            Assignment.objects.get(pk=self.assignment.pk)
+            Assignment.objects.get(pk=self.assignment.pk)
+
+    def test_writes_empty_the_map(self):
+        with identity.scope():
+            Assignment.objects.get(pk=self.assignment.pk)
+            Assignment.objects.filter(pk=self.assignment.pk).update(title='Renamed')
+            self.assertEqual(Assignment.objects.get(pk=self.assignment.pk).title, 'Renamed')
+            other = Assignment.objects.get(pk=self.assignment.pk)
+            other.title = 'Saved'
+            other.save()
+            with self.assertNumQueries(1):
+                Assignment.objects.get(pk=self.assignment.pk)
+
+    def test_rows_read_in_a_rolled_back_transaction_are_dropped(self):
+        with identity.scope():
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                Assignment.objects.filter(pk=self.assignment.pk).update(title='Rolled back')
+                Assignment.objects.get(pk=self.assignment.pk)
+                raise RuntimeError
+            self.assertEqual(Assignment.objects.get(pk=self.assignment.pk).title, 'Sorting')
+
+    def test_soft_deleted_classes_stay_hidden(self):
+        with identity.scope():
+            Class.all_objects.filter(pk=self.klass.pk).update(deleted_at=datetime(2030, 1, 1, tzinfo=dt_timezone.utc))
+            Class.all_objects.get(pk=self.klass.pk)
+            with self.assertRaises(Class.DoesNotExist):
+                Class.objects.get(pk=self.klass.pk)
+
+    def test_the_middleware_is_opt_in(self):
+        with override_settings(IDENTITY_MAP_ENABLED=False), self.assertRaises(MiddlewareNotUsed):
+            IdentityMapMiddleware(HttpResponse)
+        seen = []
+        with override_settings(IDENTITY_MAP_ENABLED=True):
+            IdentityMapMiddleware(lambda request: seen.append(identity._map.get()) or HttpResponse())(None)
+        self.assertEqual(seen, [{}])
+
+
+class ReviewQueueTests(ClassroomTestCase):
+    def setUp(self):
+        self.submissions = [self.submit(student, self.questions[0]) for student in self.students]
+        self.client = api_client(self.teacher)
+
+    def claim(self, **data):
+        response = self.client.post('/api/submissions/claim/', data, format='json')
+        self.assertEqual(response.status_code, 200)
+        return [row['id'] for row in response.data['results']]
+
+    def test_claims_never_overlap_until_the_lease_runs_out(self):
+        first = self.claim(assignment=self.assignment.pk, limit=2)
+        second = self.claim(class_assigned=self.klass.pk, limit=5)
+        self.assertEqual(len(first), 2)
+        self.assertEqual(sorted(first + second), [submission.pk for submission in self.submissions])
+        self.assertEqual(self.claim(assignment=self.assignment.pk), [])
+
+        Submission.objects.filter(pk=first[0]).update(claim_expires_at=datetime(2000, 1, 1, tzinfo=dt_timezone.utc))
+        self.assertEqual(self.claim(assignment=self.assignment.pk), [first[0]])
+
+    def test_grading_and_releasing_end_the_claim(self):
+        claimed = self.claim(assignment=self.assignment.pk, limit=3)
+        self.client.patch(f'/api/submissions/{claimed[0]}/update-status/', {'status': 'checked'}, format='json')
+        self.assertIsNone(Submission.objects.get(pk=claimed[0]).claimed_by_id)
+        response = self.client.post('/api/submissions/release/', {'submissions': [claimed[1]]}, format='json')
+        self.assertEqual(response.data['released'], 1)
+        # Checked submissions leave the queue; the released one comes back.
+        self.assertEqual(self.claim(assignment=self.assignment.pk), [claimed[1]])
+
+    def test_only_the_class_teacher_can_claim(self):
+        other = api_client(make_user('other', 'teacher'))
+        response = other.post('/api/submissions/claim/', {'assignment': self.assignment.pk}, format='json')
+        self.assertEqual(response.status_code, 404)
+        response = api_client(self.students[0]).post(
+            '/api/submissions/claim/', {'assignment': self.assignment.pk}, format='json',
+        )
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(Submission.objects.filter(claimed_by__isnull=False).exists())
+
+    def test_the_claim_locks_only_submission_rows(self):
+        # FOR UPDATE without OF locks every joined table; SQLite drops the
+        # clause, so check the locking SELECT reads the submission table alone.
+        with CaptureQueriesContext(connection) as queries:
+            ids, _ = review.claim(self.teacher, [self.assignment.pk], 1, 60)
+        self.assertEqual(len(ids), 1)
+        selects = [query['sql'] for query in queries if query['sql'].startswith('SELECT')]
+        self.assertEqual(len(selects), 1)
+        self.assertNotIn('JOIN', selects[0])
+
+
+class ReferenceCacheTests(ClassroomTestCase):
+    def test_entries_are_loaded_once_evicted_and_expired(self):
+        loads = []
+
+        def loader(keys):
+            loads.append(sorted(keys))
+            return {key: key * 10 for key in keys}
+
+        names = refcache.ReferenceCache(loader, maxsize=2, ttl=60)
+        self.assertEqual(names.get_many([1, 2]), {1: 10, 2: 20})
+        self.assertEqual(names.get(1), 10)
+        self.assertEqual(names.get(3), 30)  # evicts 2, the least recently used
+        self.assertEqual(names.get(2), 20)
+        self.assertEqual(loads, [[1, 2], [3], [2]])
+        names.invalidate(2)
+        names.get(2)
+        self.assertEqual(loads[-1], [2])
+
+        expiring = refcache.ReferenceCache(loader, maxsize=10, ttl=0)
+        expiring.get(1)
+        expiring.get(1)
+        self.assertEqual(loads[-2:], [[1], [1]])
+
+    def test_saved_names_are_served_fresh(self):
+        # The caches outlive the test's rolled-back transaction.
+        self.addCleanup(refcache.class_names.invalidate)
+        self.addCleanup(refcache.languages.invalidate)
+        self.assertEqual(refcache.class_name(self.klass.pk), 'Algorithms')
+        self.assertEqual(refcache.language_name(self.language.pk), 'Python')
+        with self.assertNumQueries(0):
+            refcache.class_name(self.klass.pk)
+        self.klass.class_name = 'Data Structures'
+        self.klass.save()
+        self.language.language_name = 'Python 3'
+        self.language.save()
+        self.assertEqual(refcache.class_name(self.klass.pk), 'Data Structures')
+        self.assertEqual(refcache.language_name(self.language.pk), 'Python 3')
+
+
+class BloomFilterTests(TestCase):
+    def test_no_false_negatives_and_few_false_positives(self):
+        bloom = revocation.BloomFilter(2000, 0.01)
+        for i in range(2000):
+            bloom.add(f'jti-{i}')
+        self.assertTrue(all(f'jti-{i}' in bloom for i in range(2000)))
+        false_positives = sum(f'other-{i}' in bloom for i in range(2000))
+        self.assertLess(false_positives, 2000 * 0.03)
+
+    def test_refreshing_does_not_count_rows_twice(self):
+        expires_at = datetime(2030, 1, 1, tzinfo=dt_timezone.utc)
+        RevokedToken.objects.bulk_create([
+            RevokedToken(jti=f'jti-{i}', token_type='access', expires_at=expires_at) for i in range(30)
+        ])
+        revoked = revocation.RevocationFilter(capacity=50, error_rate=0.01, refresh_seconds=0)
+        for _ in range(5):
+            revoked.refresh()
+        self.assertEqual(revoked._bloom.count, 30)
+        RevokedToken.objects.create(jti='late', token_type='access', expires_at=expires_at)
+        self.assertTrue(revoked.is_revoked('late'))
+        self.assertFalse(revoked.is_revoked('jti-unknown'))
+        self.assertEqual(revoked._bloom.count, 31)
+
+
+@FAST_HASHERS
+class TokenRevocationTests(TestCase):
+    def setUp(self):
+        make_user('student', 'student')
+        # The worker's filter outlives each test's rolled-back rows.
+        revocation.revoked.rebuild()
+        tokens = APIClient().post('/api/api/token/', {'username': 'student', 'password': 'pass12345'}, format='json')
+        self.assertEqual(tokens.status_code, 200)
+        self.access, self.refresh = tokens.data['access'], tokens.data['refresh']
+
+    def client_with(self, access):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+        return client
+
+    def refresh_with(self, refresh):
+        return APIClient().post('/api/api/token/refresh/', {'refresh': refresh}, format='json')
+
+    def test_rotated_refresh_tokens_cannot_be_reused(self):
+        rotated = self.refresh_with(self.refresh)
+        self.assertEqual(rotated.status_code, 200)
+        self.assertEqual(self.refresh_with(self.refresh).status_code, 401)
+        self.assertEqual(self.refresh_with(rotated.data['refresh']).status_code, 200)
+
+    def test_logout_revokes_both_tokens(self):
+        client = self.client_with(self.access)
+        self.assertEqual(client.get('/api/todo/').status_code, 200)
+        self.assertEqual(client.post('/api/api/token/revoke/', {'refresh': self.refresh}, format='json').status_code, 204)
+        self.assertEqual(client.get('/api/todo/').status_code, 401)
+        self.assertEqual(self.refresh_with(self.refresh).status_code, 401)
+
+
+class SubmitAssignmentTests(ClassroomTestCase):
+    def submit_all(self, student, answers):
+        return api_client(student).post(
+            f'/api/assignments/{self.assignment.pk}/submit/', {'answers': answers}, format='json',
+        )
+
+    def test_all_answers_are_saved_in_one_request(self):
+        student = self.students[0]
+        answers = [{'question': question.pk, 'code': f'answer {question.pk}'} for question in self.questions]
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.submit_all(student, answers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['submitted'], response.data['failed']), (2, 0))
+        self.assertEqual({row['status'] for row in response.data['results']}, {'created'})
+        self.assertEqual(Assignment.objects.get(pk=self.assignment.pk).submitted_count, 2)
+        self.assertFalse(PendingAssignment.objects.filter(student=student).exists())
+        self.assertEqual(SubmissionRevision.objects.count(), 2)
+
+        checked = Submission.objects.get(student=student, question=self.questions[0])
+        api_client(self.teacher).patch(f'/api/submissions/{checked.pk}/update-status/', {'status': 'checked'}, format='json')
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.submit_all(student, [
+                {'question': self.questions[0].pk, 'code': 'too late'},
+                {'question': self.questions[1].pk, 'code': 'second try'},
+            ])
+        self.assertEqual([row['status'] for row in response.data['results']], ['error', 'updated'])
+        self.assertEqual(Submission.objects.get(pk=checked.pk).code, f'answer {self.questions[0].pk}')
+        self.assertEqual(Submission.objects.get(student=student, question=self.questions[1]).code, 'second try')
+        self.assertEqual(Submission.objects.filter(student=student).count(), 2)
+        self.assertEqual(SubmissionRevision.objects.count(), 3)
+        self.assertEqual(reconcile(), [])
+
+    def test_bad_answers_are_reported_one_by_one(self):
+        response = self.submit_all(self.students[0], [
+            {'question': self.questions[0].pk, 'code': 'fine'},
+            {'question': self.questions[0].pk, 'code': 'again'},
+            {'question': 'abc', 'code': 'x'},
+            {'question': 999999, 'code': 'x'},
+            {'question': self.questions[1].pk, 'code': 7},
+        ])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [row['status'] for row in response.data['results']],
+            ['created', 'error', 'error', 'error', 'error'],
+        )
+
+    def test_requests_that_cannot_be_served_are_refused(self):
+        outsider = make_user('outsider', 'student')
+        answers = [{'question': self.questions[0].pk, 'code': 'x'}]
+        self.assertEqual(self.submit_all(outsider, answers).status_code, 403)
+        self.assertEqual(self.submit_all(outsider, [{'question': 999999, 'code': 'x'}]).status_code, 403)
+        self.assertEqual(self.submit_all(self.teacher, answers).status_code, 403)
+        self.assertEqual(self.submit_all(self.students[0], []).status_code, 400)
+        response = api_client(self.students[0]).post('/api/assignments/999999/submit/', {'answers': answers}, format='json')
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(Submission.objects.exists())
+
+
+class ActivityRollupTests(ClassroomTestCase):
+    def activity_rows(self):
+        return sorted(SubmissionActivity.objects.values_list(
+            'class_assigned_id', 'assignment_id', 'status', 'granularity', 'bucket', 'count',
+        ))
+
+    def make_activity(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            for student in self.students:
+                self.submit(student, self.questions[0])
+            checked = self.submit(self.students[0], self.questions[1])
+            checked.status = 'checked'
+            checked.save()
+            self.submit(self.students[1], self.questions[1]).delete()
+
+    def test_series_counts_submissions_per_status(self):
+        self.make_activity()
+        now = datetime.now(dt_timezone.utc)
+        day = rollups.bucket_start(now, 'day')
+        series = rollups.series('day', day, now + rollups.GRANULARITIES['day'], class_assigned_id=self.klass.pk)
+        self.assertEqual(len(series), 1)
+        self.assertEqual(series[0]['bucket'], day)
+        self.assertEqual((series[0]['total'], series[0]['submitted'], series[0]['checked']), (4, 3, 1))
+        hourly = rollups.series('hour', day, now + rollups.GRANULARITIES['hour'], assignment_id=self.assignment.pk)
+        self.assertEqual(sum(bucket['total'] for bucket in hourly), 4)
+
+    def test_rebuild_matches_the_incremental_rows(self):
+        self.make_activity()
+        incremental = self.activity_rows()
+        self.assertEqual(rollups.rebuild_class(self.klass.pk), len(incremental))
+        self.assertEqual(self.activity_rows(), incremental)
+
+        SubmissionActivity.objects.all().delete()
+        out = io.StringIO()
+        call_command('backfill_submission_activity', stdout=out)
+        self.assertEqual(self.activity_rows(), incremental)
+        self.assertIn(f'class {self.klass.pk}: {len(incremental)} rollup rows', out.getvalue())
+
+    def test_activity_endpoints(self):
+        self.make_activity()
+        client = api_client(self.teacher)
+        response = client.get('/api/activity/', {'class_assigned': self.klass.pk})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['granularity'], 'day')
+        self.assertEqual(sum(bucket['total'] for bucket in response.data['results']), 4)
+
+        response = client.get(f'/api/activity/due-offsets/{self.assignment.pk}/')
+        self.assertEqual(response.status_code, 200)
+        days = (datetime.now(dt_timezone.utc).date() - self.assignment.due_date).days
+        self.assertEqual(response.data['results'], [{'days': days, 'count': 4}])
+
+        for params in (
+            {'class_assigned': self.klass.pk, 'granularity': 'week'},
+            {},
+            {'class_assigned': self.klass.pk, 'start': '2030-01-02', 'end': '2030-01-01'},
+            {'class_assigned': self.klass.pk, 'start': 'yesterday'},
+            {'class_assigned': self.klass.pk, 'granularity': 'hour', 'start': '2000-01-01', 'end': '2030-01-01'},
+        ):
+            self.assertEqual(client.get('/api/activity/', params).status_code, 400, params)
+        self.assertEqual(client.get('/api/activity/due-offsets/999999/').status_code, 404)
+
+        student = api_client(self.students[0])
+        self.assertEqual(student.get('/api/activity/', {'class_assigned': self.klass.pk}).status_code, 403)
+        self.assertEqual(student.get(f'/api/activity/due-offsets/{self.assignment.pk}/').status_code, 403)
+
+    def test_teachers_only_see_their_own_classes(self):
+        self.make_activity()
+        other = api_client(make_user('other', 'teacher'))
+        self.assertEqual(other.get('/api/activity/', {'class_assigned': self.klass.pk}).status_code, 404)
+        self.assertEqual(other.get('/api/activity/', {'assignment': self.assignment.pk}).status_code, 404)
+        self.assertEqual(other.get(f'/api/activity/due-offsets/{self.assignment.pk}/').status_code, 404)
+
+        Class.objects.filter(pk=self.klass.pk).update(deleted_at=datetime(2030, 1, 1, tzinfo=dt_timezone.utc))
+        client = api_client(self.teacher)
+        self.assertEqual(client.get('/api/activity/', {'class_assigned': self.klass.pk}).status_code, 404)
+        self.assertEqual(client.get('/api/activity/', {'assignment': self.assignment.pk}).status_code, 404)
+        self.assertEqual(client.get(f'/api/activity/due-offsets/{self.assignment.pk}/').status_code, 404)
+
+
+class LeaderboardTests(ClassroomTestCase):
+    def entries(self):
+        return sorted(LeaderboardEntry.objects.values_list(
+            'class_assigned_id', 'student_id', 'checked_count', 'on_time_count', 'submission_count', 'score',
+        ))
+
+    def make_scores(self):
+        first, second, _ = self.students
+        with self.captureOnCommitCallbacks(execute=True):
+            for question in self.questions:
+                submission = self.submit(first, question)
+                submission.status = 'checked'
+                submission.save()
+            self.submit(second, self.questions[0])
+            self.submit(second, self.questions[1]).delete()
+
+    def test_scores_follow_submissions(self):
+        self.make_scores()
+        first, second, third = self.students
+        self.assertEqual(
+            [(row['student'], row['checked_count'], row['submission_count'], row['score']) for row in leaderboard.top(self.klass.pk, 10)],
+            [(first.pk, 2, 2, leaderboard.score(2, 2, 2)), (second.pk, 0, 1, leaderboard.score(0, 1, 1)), (third.pk, 0, 0, 0)],
+        )
+        self.assertEqual(leaderboard.top(self.klass.pk, 10)[0]['on_time_rate'], 1.0)
+        self.assertIsNone(leaderboard.top(self.klass.pk, 10)[2]['on_time_rate'])
+
+        incremental = self.entries()
+        self.assertEqual(leaderboard.rebuild_class(self.klass.pk), 3)
+        self.assertEqual(self.entries(), incremental)
+        LeaderboardEntry.objects.all().delete()
+        call_command('rebuild_leaderboard', stdout=io.StringIO())
+        self.assertEqual(self.entries(), incremental)
+
+    def test_enrolment_adds_and_removes_entries(self):
+        self.make_scores()
+        first = self.students[0]
+        ClassStudent.objects.filter(student=first, class_assigned=self.klass).get().delete()
+        self.assertFalse(LeaderboardEntry.objects.filter(student=first).exists())
+        ClassStudent.objects.create(student=first, class_assigned=self.klass)
+        entry = LeaderboardEntry.objects.get(student=first, class_assigned=self.klass)
+        # Rejoining brings the student's existing submissions back with them.
+        self.assertEqual((entry.checked_count, entry.submission_count), (2, 2))
+
+    def test_leaderboard_endpoints(self):
+        self.make_scores()
+        first, second, third = self.students
+        client = api_client(self.teacher)
+        response = client.get(f'/api/classes/{self.klass.pk}/leaderboard/', {'limit': 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([(row['rank'], row['student']) for row in response.data['results']], [(1, first.pk), (2, second.pk)])
+        self.assertEqual(client.get(f'/api/classes/{self.klass.pk}/leaderboard/', {'limit': 'x'}).status_code, 400)
+
+        response = client.get(f'/api/classes/{self.klass.pk}/leaderboard/{second.pk}/', {'around': 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['rank'], 2)
+        self.assertEqual([row['student'] for row in response.data['above']], [first.pk])
+        self.assertEqual([(row['rank'], row['student']) for row in response.data['below']], [(3, third.pk)])
+        outsider = make_user('outsider', 'student')
+        self.assertEqual(client.get(f'/api/classes/{self.klass.pk}/leaderboard/{outsider.pk}/').status_code, 404)
+        self.assertEqual(api_client(first).get(f'/api/classes/{self.klass.pk}/leaderboard/').status_code, 404)
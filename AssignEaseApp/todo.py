@@ -0,0 +1,114 @@
+"""
+Per-student queue of assignments that are still due.
+
+``PendingAssignment`` holds one row per (student, assignment) without a
+submission, ordered by due date through the ``pending_by_due_date`` index.
+The receivers in ``signals.py`` keep it current as assignments are
+created or changed, students join or leave classes and submissions come
+in; bulk write paths call these helpers directly.
+"""
+from django.db import transaction
+from django.db.models import Q
+
+from .models import Assignment, ClassStudent, Submission, ArchivedSubmission, PendingAssignment
+
+BATCH_SIZE = 1000
+
+
+def _submitted_students(assignment_id):
+    return set(Submission.objects.filter(assignment_id=assignment_id).values_list('student_id', flat=True)) | set(
+        ArchivedSubmission.objects.filter(assignment_id=assignment_id).values_list('student_id', flat=True)
+    )
+
+
+def sync_assignment(assignment):
+    """Rebuild the pending rows of one assignment from scratch."""
+    students = ClassStudent.objects.filter(class_assigned_id=assignment.class_assigned_id) \
+        .values_list('student_id', flat=True)
+    submitted = _submitted_students(assignment.pk)
+    with transaction.atomic():
+        PendingAssignment.objects.filter(assignment=assignment).delete()
+        PendingAssignment.objects.bulk_create(
+            [
+                PendingAssignment(
+                    student_id=student_id,
+                    assignment=assignment,
+                    class_assigned_id=assignment.class_assigned_id,
+                    due_date=assignment.due_date,
+                )
+                for student_id in students
+                if student_id not in submitted
+            ],
+            batch_size=BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+
+
+def students_enrolled(class_id, student_ids):
+    """Queue the class's unsubmitted assignments for newly enrolled students."""
+    student_ids = list(student_ids)
+    if not student_ids:
+        return
+    assignments = list(Assignment.objects.filter(class_assigned_id=class_id).values_list('pk', 'due_date'))
+    if not assignments:
+        return
+    assignment_ids = [pk for pk, _ in assignments]
+    submitted = set()
+    for model in (Submission, ArchivedSubmission):
+        submitted.update(
+            model.objects.filter(assignment_id__in=assignment_ids, student_id__in=student_ids)
+            .values_list('student_id', 'assignment_id')
+        )
+    PendingAssignment.objects.bulk_create(
+        [
+            PendingAssignment(student_id=student_id, assignment_id=pk, class_assigned_id=class_id, due_date=due_date)
+            for student_id in student_ids
+            for pk, due_date in assignments
+            if (student_id, pk) not in submitted
+        ],
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def student_unenrolled(class_id, student_id):
+    PendingAssignment.objects.filter(class_assigned_id=class_id, student_id=student_id).delete()
+
+
+def submissions_received(pairs):
+    """Drop the queue entries for ``(student_id, assignment_id)`` pairs."""
+    query = Q()
+    for student_id, assignment_id in set(pairs):
+        query |= Q(student_id=student_id, assignment_id=assignment_id)
+    if query:
+        PendingAssignment.objects.filter(query).delete()
+
+
+def submission_removed(student_id, assignment_id):
+    """Queue the assignment again once the student's last submission for it is gone."""
+    if Submission.objects.filter(student_id=student_id, assignment_id=assignment_id).exists():
+        return
+    assignment = Assignment.objects.filter(pk=assignment_id).values('class_assigned_id', 'due_date').first()
+    if assignment is None:
+        return
+    if ClassStudent.objects.filter(student_id=student_id, class_assigned_id=assignment['class_assigned_id']).exists():
+        PendingAssignment.objects.bulk_create(
+            [PendingAssignment(student_id=student_id, assignment_id=assignment_id, **assignment)],
+            ignore_conflicts=True,
+        )
+
+
+def rebuild(progress=None):
+    """Recompute the whole queue, one assignment at a time."""
+    last = 0
+    done = 0
+    while True:
+        batch = list(Assignment.objects.filter(pk__gt=last).order_by('pk')[:BATCH_SIZE])
+        if not batch:
+            return done
+        for assignment in batch:
+            sync_assignment(assignment)
+        last = batch[-1].pk
+        done += len(batch)
+        if progress:
+            progress(done)
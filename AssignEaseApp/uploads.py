@@ -0,0 +1,51 @@
+"""
+Streaming uploads for submission files.
+
+``SizeLimitUploadHandler`` sits in front of Django's
+``TemporaryFileUploadHandler``, so every chunk is written straight to a
+temporary file on disk and the limits are checked as the bytes arrive,
+before the whole request has been read.
+"""
+from django.core.files.uploadhandler import FileUploadHandler, StopUpload, TemporaryFileUploadHandler
+
+
+class SizeLimitUploadHandler(FileUploadHandler):
+    def __init__(self, request=None, max_file_size=None, max_total_size=None, already_stored=0):
+        super().__init__(request)
+        self.max_file_size = max_file_size
+        self.max_total_size = max_total_size
+        self.file_size = 0
+        self.total_size = already_stored
+        self.error = None
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.file_size = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.file_size += len(raw_data)
+        self.total_size += len(raw_data)
+        if self.max_file_size is not None and self.file_size > self.max_file_size:
+            self.error = f"{self.file_name} is larger than {self.max_file_size} bytes."
+        elif self.max_total_size is not None and self.total_size > self.max_total_size:
+            self.error = f"The files of a submission may not exceed {self.max_total_size} bytes in total."
+        if self.error:
+            # Discard the rest of the body without buffering it and stop parsing.
+            raise StopUpload(connection_reset=False)
+        return raw_data
+
+    def file_complete(self, file_size):
+        return None
+
+
+def install_upload_handlers(request, max_file_size, max_total_size, already_stored=0):
+    """
+    Make ``request`` stream its files to disk under the given limits.
+
+    Must be called before ``request.data`` or ``request.FILES`` is touched.
+    Returns the limiter, whose ``error`` is set if a limit was exceeded.
+    """
+    django_request = getattr(request, '_request', request)
+    limiter = SizeLimitUploadHandler(django_request, max_file_size, max_total_size, already_stored)
+    django_request.upload_handlers = [limiter, TemporaryFileUploadHandler(django_request)]
+    return limiter
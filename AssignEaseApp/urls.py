@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import RegisterView, UserViewSet, ProfileViewSet,UpdateSubmissionStatus,AssignmentByQuestionView, StudentDetailView, AssignmentListView, ClassViewSet, StudentSubmissionsView, ClassStudentViewSet,ClassSimpleDetailView, AssignmentDetailView, ProgrammingLanguageViewSet, AssignmentViewSet, AssignmentQuestionViewSet, SubmissionViewSet, TeacherFeedbackViewSet, JoinedClassesView, CustomTokenObtainPairView, DeleteClassView, get_students_in_class, student_performance
+from .views import RegisterView, UserViewSet, ProfileViewSet,UpdateSubmissionStatus,AssignmentByQuestionView, StudentDetailView, AssignmentListView, ClassViewSet, StudentSubmissionsView, ClassStudentViewSet,ClassSimpleDetailView, AssignmentDetailView, ProgrammingLanguageViewSet, AssignmentViewSet, AssignmentQuestionViewSet, SubmissionViewSet, TeacherFeedbackViewSet, JoinedClassesView, CustomTokenObtainPairView, DeleteClassView, StudentTodoView, BatchView, RevokeTokenView, SubmissionActivityView, SubmissionDueOffsetView, get_students_in_class, student_performance
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from . import views
 router = DefaultRouter()
@@ -19,6 +19,7 @@ urlpatterns = [
     path('register/', RegisterView.as_view(), name='register'),
     path('api/token/', CustomTokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('api/token/revoke/', RevokeTokenView.as_view(), name='token_revoke'),
     path('joined-classes/', JoinedClassesView.as_view(), name='joined-classes'),
     path('class/simple/<int:class_id>/', ClassSimpleDetailView.as_view(), name='class-simple-detail'),
     path('class/<int:class_id>/students/', get_students_in_class, name='get_students_in_class'),
@@ -32,4 +33,8 @@ urlpatterns = [
     path('submissions/<int:submission_id>/update-status/', UpdateSubmissionStatus.as_view(), name='update-submission-status'),
     path('classes/<int:pk>/delete/', DeleteClassView.as_view(), name='delete-class'),
     path('student-performance/<int:student_id>/', student_performance, name='student-performance'),
+    path('todo/', StudentTodoView.as_view(), name='student-todo'),
+    path('batch/', BatchView.as_view(), name='batch'),
+    path('activity/', SubmissionActivityView.as_view(), name='submission-activity'),
+    path('activity/due-offsets/<int:assignment_id>/', SubmissionDueOffsetView.as_view(), name='submission-due-offsets'),
 ]
@@ -1,23 +1,47 @@
+import difflib
+import io
+from datetime import datetime, timedelta, timezone as dt_timezone
 from rest_framework import viewsets, generics
 from rest_framework.permissions import IsAuthenticated
-from .models import User, Profile, Class, ClassStudent, ProgrammingLanguage, Assignment, AssignmentQuestion, Submission, TeacherFeedback
-from .serializers import RegistrationSerializer, UserSerializer, ProfileSerializer, ClassSerializer, ClassStudentSerializer, ProgrammingLanguageSerializer, AssignmentSerializer, AssignmentQuestionSerializer, SubmissionSerializer, TeacherFeedbackSerializer, ClassStudentDetailSerializer, CustomTokenObtainPairSerializer
+from .models import User, Profile, Class, ClassStudent, ProgrammingLanguage, Assignment, AssignmentQuestion, Submission, TeacherFeedback, ArchivedSubmission, SubmissionRevision, PendingAssignment, SubmissionFile
+from .serializers import RegistrationSerializer, UserSerializer, ProfileSerializer, ClassSerializer, ClassStudentSerializer, ProgrammingLanguageSerializer, AssignmentSerializer, AssignmentQuestionSerializer, SubmissionSerializer, TeacherFeedbackSerializer, ClassStudentDetailSerializer, CustomTokenObtainPairSerializer, SubmissionRevisionSerializer, SubmissionFileSerializer
 from rest_framework.response import Response
 from rest_framework import status
 from django.shortcuts import get_object_or_404
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.settings import api_settings
 from rest_framework_simplejwt.views import TokenObtainPairView
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from .models import Assignment, ClassStudent
 from rest_framework.views import APIView
-from django.db.models import Exists, OuterRef
+from django.db.models import Exists, OuterRef, Q
 from rest_framework.decorators import action
+from rest_framework.parsers import MultiPartParser
+from rest_framework.renderers import BrowsableAPIRenderer
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Sum
+from django.http import FileResponse, Http404
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from . import leaderboard, review, revocation, rollups, routers
+from .archive import archived_submissions
+from .batch import SAFE_METHODS, run_batch
+from .cohort import find_import, import_cohort_in_background, read_csv
+from .deletion import soft_delete_class
+from .revisions import revision_code
+from .submit import SubmitError, submit_assignment
+from .uploads import install_upload_handlers
+from .projections import submission_rows, class_student_rows
+from .renderers import FastJSONRenderer
 
 
 @api_view(['GET'])
 def get_student_assignments(request, student_id):
     try:
-        student_classes = ClassStudent.objects.filter(student_id=student_id)
+        student_classes = ClassStudent.objects.filter(student_id=student_id, class_assigned__deleted_at__isnull=True)
         class_ids = student_classes.values_list('class_assigned', flat=True)
 
         assignments = Assignment.objects.filter(class_assigned__in=class_ids)
@@ -46,7 +70,7 @@ def get_students_in_class(request, class_id):
     return Response(serializer.data)
 
 class AssignmentDetailView(generics.RetrieveAPIView):
-    queryset = Assignment.objects.all()
+    queryset = Assignment.objects.filter(class_assigned__deleted_at__isnull=True)
     serializer_class = AssignmentSerializer
 
 
@@ -72,11 +96,77 @@ class CustomTokenObtainPairView(TokenObtainPairView):
             'role': role,  # Include the role in the response
         })
 
+class RevokeTokenView(APIView):
+    """
+    Log out: revoke the access token of this request and, if it is posted as
+    ``refresh``, the refresh token that goes with it.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        refresh = None
+        if request.data.get('refresh'):
+            try:
+                refresh = RefreshToken(request.data['refresh'])
+            except TokenError as e:
+                return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            if str(refresh.get(api_settings.USER_ID_CLAIM)) != str(request.user.pk):
+                return Response({"error": "That refresh token belongs to another user."}, status=status.HTTP_403_FORBIDDEN)
+
+        if request.auth is not None:
+            revocation.revoke(request.auth)
+        if refresh is not None:
+            revocation.revoke(refresh)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
 class UserViewSet(viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = [IsAuthenticated]  # Require authentication for this view
 
+    @action(detail=False, methods=['post'], url_path='import', parser_classes=[MultiPartParser])
+    def import_cohort(self, request):
+        if getattr(getattr(request.user, 'profile', None), 'role', None) != 'teacher':
+            return Response({"error": "Only teachers can import accounts."}, status=status.HTTP_403_FORBIDDEN)
+
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({"error": "Upload the CSV as 'file'."}, status=status.HTTP_400_BAD_REQUEST)
+
+        class_assigned = None
+        if request.data.get('class_assigned'):
+            class_assigned = Class.objects.filter(pk=request.data['class_assigned'], teacher=request.user).first()
+            if class_assigned is None:
+                return Response({"error": "Class not found."}, status=status.HTTP_404_NOT_FOUND)
+
+        try:
+            # Read the whole file now; the upload is gone once the request ends.
+            rows = list(read_csv(io.TextIOWrapper(upload, encoding='utf-8-sig')))
+        except (ValueError, UnicodeDecodeError) as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        job_id = import_cohort_in_background(rows, class_assigned, request.user.pk)
+        return Response(
+            {"job": job_id, "status": "running", "rows": len(rows)},
+            status=status.HTTP_202_ACCEPTED,
+        )
+
+    @action(detail=False, methods=['get'], url_path=r'import/(?P<job_id>[0-9a-f]{32})')
+    def import_status(self, request, job_id=None):
+        job = find_import(job_id, request.user.pk)
+        if job is None:
+            return Response({"error": "Import not found."}, status=status.HTTP_404_NOT_FOUND)
+        if job.status != 'done':
+            return Response({"job": job_id, "status": job.status}, status=status.HTTP_200_OK)
+
+        report = job.report
+        created = sum(row['status'] == 'created' for row in report)
+        return Response(
+            {"job": job_id, "status": "done", "created": created, "failed": len(report) - created, "rows": report},
+            status=status.HTTP_200_OK,
+        )
+
 
 class RegisterView(generics.CreateAPIView):
     serializer_class = RegistrationSerializer
@@ -106,8 +196,10 @@ class StudentDetailView(APIView):
 
 class StudentSubmissionsView(APIView):
     def get(self, request, student_id):
-        submissions = Submission.objects.filter(student=student_id)
-        if not submissions.exists():
+        submissions = list(Submission.objects.filter(student=student_id))
+        # Submissions of archived classes come from the compressed cold store.
+        submissions += archived_submissions(ArchivedSubmission.objects.filter(student=student_id))
+        if not submissions:
             return Response({"message": "No submissions found for this student."}, status=status.HTTP_404_NOT_FOUND)
         serializer = SubmissionSerializer(submissions, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
@@ -136,7 +228,10 @@ class UpdateSubmissionStatus(APIView):
             return Response({"detail": "Invalid status"}, status=status.HTTP_400_BAD_REQUEST)
         
         submission.status = new_status
-        submission.save()
+        if new_status != 'submitted':
+            review.clear_claim(submission)
+        with transaction.atomic():
+            submission.save()
         
         return Response({"detail": "Submission status updated successfully"}, status=status.HTTP_200_OK)
 
@@ -157,6 +252,40 @@ class ClassViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         return Class.objects.filter(teacher_id=self.request.user)
 
+    def perform_destroy(self, instance):
+        soft_delete_class(instance)
+
+    @action(detail=True, methods=['post'])
+    def close(self, request, pk=None):
+        class_instance = self.get_object()
+        if class_instance.closed_at is None:
+            class_instance.closed_at = timezone.now()
+            class_instance.save(update_fields=['closed_at'])
+        return Response(self.get_serializer(class_instance).data, status=status.HTTP_200_OK)
+
+    @action(detail=True, methods=['get'])
+    def leaderboard(self, request, pk=None):
+        # The top ?limit= students of the class (default 10, at most 100).
+        class_instance = self.get_object()
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', 10)), 100))
+        except ValueError:
+            return Response({"error": "limit must be a number."}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({"results": leaderboard.top(class_instance.pk, limit)}, status=status.HTTP_200_OK)
+
+    @action(detail=True, methods=['get'], url_path=r'leaderboard/(?P<student_id>\d+)')
+    def leaderboard_standing(self, request, pk=None, student_id=None):
+        # One student's rank, with ?around= students either side of them (default 2, at most 25).
+        class_instance = self.get_object()
+        try:
+            around = max(0, min(int(request.query_params.get('around', 2)), 25))
+        except ValueError:
+            return Response({"error": "around must be a number."}, status=status.HTTP_400_BAD_REQUEST)
+        standing = leaderboard.standing(class_instance.pk, int(student_id), around)
+        if standing is None:
+            return Response({"error": "Student is not on this class's leaderboard."}, status=status.HTTP_404_NOT_FOUND)
+        return Response(standing, status=status.HTTP_200_OK)
+
 class ClassSimpleDetailView(APIView):
     def get(self, request, class_id):
         try:
@@ -182,19 +311,11 @@ class JoinedClassesView(generics.ListAPIView):
         if not user.is_authenticated:
             raise Exception("User is not authenticated")
 
-        queryset = ClassStudent.objects.filter(student=user)
-        print(f"Queryset: {queryset}")
-
-        if not queryset.exists():
-            print("No classes found for this student.") 
-        else:
-            print(f"Classes found: {queryset.count()}")
-
-        return queryset
+        return ClassStudent.objects.filter(student=user, class_assigned__deleted_at__isnull=True)
 
 class AssignmentListView(APIView):
     def get(self, request, class_assigned_id):
-        assignments = Assignment.objects.filter(class_assigned__id=class_assigned_id)
+        assignments = Assignment.objects.filter(class_assigned__id=class_assigned_id, class_assigned__deleted_at__isnull=True)
         
         if not assignments.exists():
             return Response({"detail": "No assignments found for this class ID."}, status=status.HTTP_404_NOT_FOUND)
@@ -206,9 +327,10 @@ class AssignmentListView(APIView):
 
 
 class ClassStudentViewSet(viewsets.ModelViewSet):
-    queryset = ClassStudent.objects.all()
+    queryset = ClassStudent.objects.filter(class_assigned__deleted_at__isnull=True)
     serializer_class = ClassStudentSerializer
     permission_classes = [IsAuthenticated]
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
     
     @action(detail=True, methods=['get'], url_path='students')
     
@@ -236,7 +358,8 @@ class ClassStudentViewSet(viewsets.ModelViewSet):
 
     def list(self, request, *args, **kwargs):
         queryset = self.get_queryset()
-        print(queryset)
+        if settings.FAST_LIST_ENDPOINTS:
+            return Response(class_student_rows(queryset))
         serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data)
 
@@ -247,10 +370,29 @@ class ProgrammingLanguageViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
 
 class AssignmentViewSet(viewsets.ModelViewSet):
-    queryset = Assignment.objects.all()
+    queryset = Assignment.objects.filter(class_assigned__deleted_at__isnull=True)
     serializer_class = AssignmentSerializer
     permission_classes = [IsAuthenticated]
 
+    @action(detail=True, methods=['post'])
+    def submit(self, request, pk=None):
+        # Answer every question of the assignment at once: {"answers": [{"question": id, "code": "..."}, ...]}.
+        if request.user.profile.role != 'student':
+            return Response({"error": "Only students can submit assignments."}, status=status.HTTP_403_FORBIDDEN)
+        if not str(pk).isdigit():
+            return Response({"error": "Assignment not found."}, status=status.HTTP_404_NOT_FOUND)
+        answers = request.data.get('answers') if isinstance(request.data, dict) else None
+        try:
+            results = submit_assignment(request.user, int(pk), answers)
+        except SubmitError as e:
+            return Response({"error": str(e)}, status=e.status_code)
+
+        submitted = sum(result['status'] != 'error' for result in results)
+        return Response(
+            {"submitted": submitted, "failed": len(results) - submitted, "results": results},
+            status=status.HTTP_200_OK if submitted else status.HTTP_400_BAD_REQUEST,
+        )
+
 class AssignmentQuestionViewSet(viewsets.ModelViewSet):
     queryset = AssignmentQuestion.objects.all()
     serializer_class = AssignmentQuestionSerializer
@@ -260,6 +402,7 @@ class SubmissionViewSet(viewsets.ModelViewSet):
     queryset = Submission.objects.all()
     serializer_class = SubmissionSerializer
     permission_classes = [IsAuthenticated]
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
 
     def get_queryset(self):
         user = self.request.user
@@ -272,6 +415,141 @@ class SubmissionViewSet(viewsets.ModelViewSet):
         # If the user is a student (check the profile's role)
         return Submission.objects.filter(student=user)
 
+    def get_archived_queryset(self):
+        if self.request.user.profile.role == 'teacher':
+            return ArchivedSubmission.objects.all()
+        return ArchivedSubmission.objects.filter(student=self.request.user)
+
+    def list(self, request, *args, **kwargs):
+        # ?archived=true appends submissions of archived classes (slower, decompressed per row).
+        queryset = self.filter_queryset(self.get_queryset())
+        if settings.FAST_LIST_ENDPOINTS:
+            rows = submission_rows(queryset)
+        else:
+            rows = self.get_serializer(queryset, many=True).data
+        if request.query_params.get('archived') in ('1', 'true'):
+            rows = list(rows) + self.get_serializer(archived_submissions(self.get_archived_queryset()), many=True).data
+        return Response(rows)
+
+    def retrieve(self, request, *args, **kwargs):
+        try:
+            return super().retrieve(request, *args, **kwargs)
+        except Http404:
+            archived = archived_submissions(self.get_archived_queryset().filter(pk=kwargs['pk']))
+            if not archived:
+                raise
+            return Response(self.get_serializer(archived[0]).data)
+
+    def get_submission_id(self):
+        # Revision history stays readable after the submission is archived.
+        pk = self.kwargs['pk']
+        if not pk.isdigit():
+            raise Http404
+        if self.get_queryset().filter(pk=pk).exists() or self.get_archived_queryset().filter(pk=pk).exists():
+            return int(pk)
+        raise Http404
+
+    @action(detail=True, methods=['get'])
+    def revisions(self, request, pk=None):
+        revisions = SubmissionRevision.objects.filter(submission_id=self.get_submission_id()).order_by('number')
+        return Response(SubmissionRevisionSerializer(revisions, many=True).data)
+
+    @action(detail=True, methods=['get'], url_path=r'revisions/(?P<number>\d+)')
+    def revision(self, request, pk=None, number=None):
+        submission_id = self.get_submission_id()
+        code = revision_code(submission_id, int(number))
+        if code is None:
+            return Response({"detail": "Revision not found."}, status=status.HTTP_404_NOT_FOUND)
+
+        # ?diff=<n> returns a unified diff from revision n to this one instead of the code.
+        diff_from = request.query_params.get('diff')
+        if diff_from is None:
+            return Response({"number": int(number), "code": code})
+        old_code = revision_code(submission_id, int(diff_from)) if diff_from.isdigit() else None
+        if old_code is None:
+            return Response({"detail": "Revision to diff against not found."}, status=status.HTTP_404_NOT_FOUND)
+        diff = difflib.unified_diff(
+            old_code.splitlines(keepends=True), code.splitlines(keepends=True),
+            fromfile=f"revision {diff_from}", tofile=f"revision {number}",
+        )
+        return Response({"number": int(number), "from": int(diff_from), "diff": ''.join(diff)})
+
+    @action(detail=True, methods=['get', 'post'], parser_classes=[MultiPartParser])
+    def files(self, request, pk=None):
+        if request.method == 'GET':
+            files = SubmissionFile.objects.filter(submission_id=self.get_submission_id()).order_by('pk')
+            return Response(SubmissionFileSerializer(files, many=True).data)
+
+        submission = self.get_object()
+        if submission.student_id != request.user.id:
+            return Response({"error": "Only the student who submitted can upload files."}, status=status.HTTP_403_FORBIDDEN)
+
+        # Stream to temporary files on disk, enforcing the limits chunk by chunk.
+        stored = SubmissionFile.objects.filter(submission=submission).aggregate(total=Sum('size'))['total'] or 0
+        limiter = install_upload_handlers(
+            request, settings.SUBMISSION_FILE_MAX_SIZE, settings.SUBMISSION_FILES_MAX_TOTAL_SIZE, stored,
+        )
+        uploads = request.FILES.getlist('files')
+        if limiter.error:
+            for upload in uploads:
+                upload.close()
+            return Response({"error": limiter.error}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        if not uploads:
+            return Response({"error": "Upload one or more files as 'files'."}, status=status.HTTP_400_BAD_REQUEST)
+
+        created = []
+        for upload in uploads:
+            submission_file = SubmissionFile(submission=submission, name=upload.name, size=upload.size)
+            # Moves the temporary file into storage instead of copying it through memory.
+            submission_file.file.save(upload.name, upload, save=False)
+            submission_file.save()
+            created.append(submission_file)
+        return Response(SubmissionFileSerializer(created, many=True).data, status=status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=['get'], url_path=r'files/(?P<file_id>\d+)')
+    def download(self, request, pk=None, file_id=None):
+        submission_file = get_object_or_404(SubmissionFile, pk=file_id, submission_id=self.get_submission_id())
+        return FileResponse(submission_file.file.open('rb'), as_attachment=True, filename=submission_file.name)
+
+    @action(detail=False, methods=['post'])
+    def claim(self, request):
+        # Lease the next unreviewed submissions of an assignment or a whole class to this grader.
+        if request.user.profile.role != 'teacher':
+            return Response({"error": "Only teachers can claim submissions."}, status=status.HTTP_403_FORBIDDEN)
+
+        assignment_id = str(request.data.get('assignment', ''))
+        class_id = str(request.data.get('class_assigned', ''))
+        assignments = Assignment.objects.filter(
+            class_assigned__deleted_at__isnull=True, class_assigned__teacher=request.user,
+        )
+        if assignment_id.isdigit():
+            assignments = assignments.filter(pk=assignment_id)
+        elif class_id.isdigit():
+            assignments = assignments.filter(class_assigned_id=class_id)
+        else:
+            return Response({"error": "Pass an 'assignment' or 'class_assigned' id."}, status=status.HTTP_400_BAD_REQUEST)
+        assignment_ids = list(assignments.values_list('pk', flat=True))
+        if not assignment_ids:
+            return Response({"error": "No assignments found."}, status=status.HTTP_404_NOT_FOUND)
+
+        try:
+            limit = int(request.data.get('limit', settings.REVIEW_CLAIM_DEFAULT_LIMIT))
+        except (TypeError, ValueError):
+            return Response({"error": "limit must be a number."}, status=status.HTTP_400_BAD_REQUEST)
+        limit = max(1, min(limit, settings.REVIEW_CLAIM_MAX_LIMIT))
+
+        ids, expires_at = review.claim(request.user, assignment_ids, limit, settings.REVIEW_CLAIM_LEASE_SECONDS)
+        rows = submission_rows(Submission.objects.filter(pk__in=ids).order_by('pk'))
+        return Response({"claim_expires_at": expires_at, "results": rows}, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['post'])
+    def release(self, request):
+        # Hand claimed submissions back to the queue: the listed ids, or all of this grader's claims.
+        ids = request.data.get('submissions')
+        if ids is not None and (not isinstance(ids, list) or not all(str(pk).isdigit() for pk in ids)):
+            return Response({"error": "'submissions' must be a list of ids."}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({"released": review.release(request.user, ids)}, status=status.HTTP_200_OK)
+
 
 
 
@@ -296,7 +574,7 @@ class DeleteClassView(APIView):
                     status=status.HTTP_403_FORBIDDEN
                 )
 
-            class_instance.delete()
+            soft_delete_class(class_instance)
             return Response({"message": "Class deleted successfully."}, status=status.HTTP_200_OK)
 
         except Exception as e:
@@ -309,7 +587,7 @@ class DeleteClassView(APIView):
 def student_performance(request, student_id):
     try:
         # Total assignments assigned
-        assigned_classes = ClassStudent.objects.filter(student_id=student_id).values_list("class_assigned", flat=True)
+        assigned_classes = ClassStudent.objects.filter(student_id=student_id, class_assigned__deleted_at__isnull=True).values_list("class_assigned", flat=True)
         total_assignments = Assignment.objects.filter(class_assigned__in=assigned_classes).count()
 
         # Submissions breakdown
@@ -330,4 +608,163 @@ def student_performance(request, student_id):
         return Response(performance_data)
 
     except Exception as e:
-        return Response({"error": str(e)}, status=400)        
\ No newline at end of file
+        return Response({"error": str(e)}, status=400)
+
+
+class StudentTodoView(APIView):
+    """
+    The signed-in student's unsubmitted assignments, soonest due first.
+
+    Keyset paged: pass the returned ``next`` cursor back as ``?after=``.
+    """
+    permission_classes = [IsAuthenticated]
+    default_limit = 20
+    max_limit = 100
+
+    def get(self, request):
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', self.default_limit)), self.max_limit))
+        except ValueError:
+            return Response({"error": "limit must be a number."}, status=status.HTTP_400_BAD_REQUEST)
+
+        pending = PendingAssignment.objects.filter(student=request.user, class_assigned__deleted_at__isnull=True)
+        after = request.query_params.get('after')
+        if after:
+            due_date, _, assignment_id = after.partition('_')
+            due_date = parse_date(due_date) if assignment_id.isdigit() else None
+            if due_date is None:
+                return Response({"error": "Invalid cursor."}, status=status.HTTP_400_BAD_REQUEST)
+            pending = pending.filter(Q(due_date__gt=due_date) | Q(due_date=due_date, assignment_id__gt=assignment_id))
+
+        rows = list(
+            pending.order_by('due_date', 'assignment_id').values(
+                'assignment_id', 'assignment__title', 'class_assigned_id', 'class_assigned__class_name', 'due_date',
+            )[:limit + 1]
+        )
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = f"{rows[-1]['due_date'].isoformat()}_{rows[-1]['assignment_id']}"
+
+        results = [
+            {
+                "assignment": row['assignment_id'],
+                "title": row['assignment__title'],
+                "class_assigned": row['class_assigned_id'],
+                "class_name": row['class_assigned__class_name'],
+                "due_date": row['due_date'].isoformat(),
+            }
+            for row in rows
+        ]
+        return Response({"results": results, "next": next_cursor}, status=status.HTTP_200_OK)
+
+
+class BatchView(APIView):
+    """
+    Run several API calls in one round trip.
+
+    POST ``{"requests": [{"method": "GET", "path": "class/simple/1/"}, ...]}``
+    and get ``{"responses": [{"status": 200, "body": ...}, ...]}`` back in
+    the same order.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        items = request.data.get('requests') if isinstance(request.data, dict) else None
+        if not isinstance(items, list) or not items:
+            return Response({"error": "'requests' must be a non-empty list."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > settings.BATCH_MAX_REQUESTS:
+            return Response(
+                {"error": f"A batch may contain at most {settings.BATCH_MAX_REQUESTS} requests."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        # A batch of reads may use a replica even though the batch itself is a POST.
+        state = routers.current_state()
+        if state is not None and all(
+            isinstance(item, dict) and str(item.get('method', 'GET')).upper() in SAFE_METHODS for item in items
+        ):
+            state.use_primary = False
+
+        return Response({"responses": run_batch(request, items)}, status=status.HTTP_200_OK)
+
+
+def parse_moment(value):
+    """An ISO date or datetime query parameter as an aware datetime, or None."""
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        moment = datetime.combine(day, datetime.min.time()) if day else None
+    if moment is not None and timezone.is_naive(moment):
+        moment = timezone.make_aware(moment, dt_timezone.utc)
+    return moment
+
+
+class SubmissionActivityView(APIView):
+    """
+    Submissions per hour or day for one of the teacher's classes or
+    assignments, read from the activity rollups only.
+
+    ``?class_assigned=<id>`` or ``?assignment=<id>``; ``granularity`` is
+    ``day`` (default) or ``hour``; ``start`` and ``end`` are ISO dates or
+    datetimes and default to the last 30 days or 48 hours.
+    """
+    permission_classes = [IsAuthenticated]
+    default_window = {'day': timedelta(days=30), 'hour': timedelta(hours=48)}
+
+    def get(self, request):
+        if request.user.profile.role != 'teacher':
+            return Response({"error": "Only teachers can view activity."}, status=status.HTTP_403_FORBIDDEN)
+
+        granularity = request.query_params.get('granularity', 'day')
+        if granularity not in rollups.GRANULARITIES:
+            return Response({"error": "granularity must be 'hour' or 'day'."}, status=status.HTTP_400_BAD_REQUEST)
+        class_id = request.query_params.get('class_assigned', '')
+        assignment_id = request.query_params.get('assignment', '')
+        if assignment_id.isdigit():
+            assignment = get_object_or_404(
+                Assignment, pk=assignment_id, class_assigned__teacher=request.user, class_assigned__deleted_at__isnull=True,
+            )
+            filters = {'assignment_id': assignment.pk}
+        elif class_id.isdigit():
+            class_instance = get_object_or_404(Class, pk=class_id, teacher=request.user)
+            filters = {'class_assigned_id': class_instance.pk}
+        else:
+            return Response({"error": "Pass a 'class_assigned' or 'assignment' id."}, status=status.HTTP_400_BAD_REQUEST)
+
+        end = parse_moment(request.query_params['end']) if 'end' in request.query_params else timezone.now()
+        start = parse_moment(request.query_params['start']) if 'start' in request.query_params else (
+            end and end - self.default_window[granularity]
+        )
+        if start is None or end is None or start >= end:
+            return Response({"error": "start and end must be ISO dates or datetimes, start first."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if (end - start) / rollups.GRANULARITIES[granularity] > settings.ACTIVITY_MAX_BUCKETS:
+            return Response({"error": f"At most {settings.ACTIVITY_MAX_BUCKETS} buckets per request."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        results = rollups.series(granularity, rollups.bucket_start(start, granularity), end, **filters)
+        return Response({"granularity": granularity, "start": start, "end": end, "results": results},
+                        status=status.HTTP_200_OK)
+
+
+class SubmissionDueOffsetView(APIView):
+    """
+    When students submit an assignment relative to its due date, from the
+    daily (``?granularity=day``, default) or hourly activity rollups.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, assignment_id):
+        if request.user.profile.role != 'teacher':
+            return Response({"error": "Only teachers can view activity."}, status=status.HTTP_403_FORBIDDEN)
+        granularity = request.query_params.get('granularity', 'day')
+        if granularity not in rollups.GRANULARITIES:
+            return Response({"error": "granularity must be 'hour' or 'day'."}, status=status.HTTP_400_BAD_REQUEST)
+        assignment = get_object_or_404(
+            Assignment, pk=assignment_id, class_assigned__teacher=request.user, class_assigned__deleted_at__isnull=True,
+        )
+        return Response(
+            {"assignment": assignment.pk, "due_date": assignment.due_date, "results": rollups.due_offsets(assignment, granularity)},
+            status=status.HTTP_200_OK,
+        )